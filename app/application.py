@@ -3,7 +3,7 @@
 """
 
 import pandas as pd
-from typing import Optional
+from typing import List, Optional
 import sys
 import os
 
@@ -12,9 +12,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     from utils.logger import logger
+    from config.settings import INCREMENTAL_CONFIG
     from services.data_service import DataService
+    from services.incremental_profit_table import IncrementalProfitTable
     from services.excel_service import ExcelService
-    from models.data_models import ProcessingResult
+    from models.data_models import MatchReport, ProcessingResult
+    from utils.categorical import concat_frames
 except ImportError as e:
     import logging
     logger = logging.getLogger(__name__)
@@ -27,17 +30,32 @@ class Application:
     def __init__(self):
         self.data_service = DataService()
         self.excel_service = ExcelService()
+        # 增量毛利表：原始数据修改少量行后只重建受影响的组合
+        self.incremental_profit_table = IncrementalProfitTable(self.data_service)
         
         # 数据存储
         self.original_data: Optional[pd.DataFrame] = None
         self.processed_data: Optional[pd.DataFrame] = None
         self.profit_table_data: Optional[pd.DataFrame] = None
         self.updated_data: Optional[pd.DataFrame] = None
+        self.match_report: Optional[MatchReport] = None
+
+        # 导入时只读取处理流程需要的列，完整宽度的原始数据在导出时按需读取
+        self.source_file_path: Optional[str] = None
+        self._full_original_data: Optional[pd.DataFrame] = None
+        # 导入后在程序中修改过的列，导出完整宽度的原始数据时使用修改后的值
+        self._edited_columns: List[str] = []
 
     def import_data(self, file_path: str) -> ProcessingResult:
         """导入Excel数据"""
         try:
-            self.original_data = self.data_service.import_excel_data(file_path)
+            self.original_data = self.data_service.import_excel_data(
+                file_path, columns=self.data_service.get_required_columns()
+            )
+            self.source_file_path = file_path
+            self._full_original_data = None
+            self._edited_columns = []
+            self.incremental_profit_table.reset()
             
             return ProcessingResult(
                 success=True,
@@ -61,11 +79,16 @@ class Application:
             )
         
         try:
-            # 处理数据
-            self.processed_data = self.data_service.process_data(self.original_data)
-            
-            # 生成毛利表
-            self.profit_table_data = self.data_service.generate_profit_table(self.processed_data)
+            if INCREMENTAL_CONFIG["enabled"]:
+                # 全量生成，同时记录之后增量更新需要的状态
+                self.profit_table_data = self.incremental_profit_table.build(self.original_data)
+                self.processed_data = self.incremental_profit_table.processed_data
+            else:
+                # 处理数据
+                self.processed_data = self.data_service.process_data(self.original_data)
+                
+                # 生成毛利表
+                self.profit_table_data = self.data_service.generate_profit_table(self.processed_data)
             
             return ProcessingResult(
                 success=True,
@@ -80,6 +103,85 @@ class Application:
                 message=f"处理数据失败: {str(e)}"
             )
 
+    def update_original_rows(self, changes: pd.DataFrame) -> ProcessingResult:
+        """修改原始数据中的部分行并更新毛利表
+
+        Args:
+            changes: 修改后的取值，索引为原始数据的行索引，列为要修改的列；
+                已生成过毛利表且开启增量模式时，只重建这些行影响到的配置颜色组合
+        """
+        if self.original_data is None:
+            return ProcessingResult(
+                success=False,
+                message="请先导入数据"
+            )
+
+        try:
+            unknown_columns = [col for col in changes.columns if col not in self.original_data.columns]
+            if unknown_columns:
+                raise ValueError(f"原始数据中没有这些列: {unknown_columns}")
+            positions = self.original_data.index.get_indexer(changes.index)
+            if (positions < 0).any():
+                raise ValueError(f"原始数据中没有这些行: {list(changes.index[positions < 0])}")
+
+            for col in changes.columns:
+                self.original_data.iloc[positions, self.original_data.columns.get_loc(col)] = changes[col].to_numpy()
+                if col not in self._edited_columns:
+                    self._edited_columns.append(col)
+            self._full_original_data = None
+
+            if INCREMENTAL_CONFIG["enabled"] and self.incremental_profit_table.ready:
+                self.profit_table_data = self.incremental_profit_table.update_rows(self.original_data, positions)
+                self.processed_data = self.incremental_profit_table.processed_data
+                return ProcessingResult(
+                    success=True,
+                    message=f"已修改{len(positions)}行，毛利表已更新，共{len(self.profit_table_data)}行",
+                    data=self.profit_table_data,
+                    row_count=len(self.profit_table_data)
+                )
+            return self.process_and_generate_profit_table()
+
+        except Exception as e:
+            logger.error(f"修改原始数据失败: {e}")
+            return ProcessingResult(
+                success=False,
+                message=f"修改原始数据失败: {str(e)}"
+            )
+
+    def stream_process_and_generate_profit_table(self, file_path: str, chunk_size: Optional[int] = None) -> ProcessingResult:
+        """流式导入并处理数据，然后生成毛利表
+
+        适用于原始数据无法整表载入内存的大文件：数据按块读取并处理，不保留完整的原始数据，
+        因此之后无法进行反向改价。生成毛利表需要去重、提取后的全部数据，内存占用随去重后的
+        行数增长（只含所需列），合并各块时短暂需要约两倍的空间。
+        """
+        try:
+            # 各块直接交给合并，合并完成后不再保留
+            processed_data = concat_frames(self.data_service.iter_processed_chunks(
+                file_path, chunk_size, columns=self.data_service.get_required_columns()
+            ))
+            self.original_data = None
+            self.incremental_profit_table.reset()
+            self.source_file_path = None
+            self._full_original_data = None
+            self.processed_data = processed_data
+
+            # 生成毛利表
+            self.profit_table_data = self.data_service.generate_profit_table(self.processed_data)
+
+            return ProcessingResult(
+                success=True,
+                message=f"毛利表生成完成，共{len(self.profit_table_data)}行",
+                data=self.profit_table_data,
+                row_count=len(self.profit_table_data)
+            )
+        except Exception as e:
+            logger.error(f"流式处理数据失败: {e}")
+            return ProcessingResult(
+                success=False,
+                message=f"流式处理数据失败: {str(e)}"
+            )
+
     def export_profit_table(self, file_path: str) -> ProcessingResult:
         """导出毛利表"""
         if self.profit_table_data is None:
@@ -89,7 +191,7 @@ class Application:
             )
         
         return self.excel_service.export_profit_table(
-            file_path, self.profit_table_data, self.original_data
+            file_path, self.profit_table_data, self._get_full_original_data()
         )
 
     def import_modified_profit_table(self, file_path: str) -> ProcessingResult:
@@ -112,13 +214,15 @@ class Application:
             self.updated_data = self.data_service.update_prices(
                 self.original_data.copy(), modified_profit_table
             )
+            self.match_report = self.data_service.get_match_report()
             
             # 更新毛利表数据
             self.profit_table_data = modified_profit_table
             
             return ProcessingResult(
                 success=True,
-                message="已成功导入更新后的毛利表并更新价格",
+                message=f"已成功导入更新后的毛利表并更新价格：匹配成功{self.match_report.matched_count}行，"
+                        f"未匹配{self.match_report.unmatched_count}行",
                 data=self.updated_data,
                 row_count=len(self.updated_data)
             )
@@ -131,15 +235,44 @@ class Application:
 
     def export_updated_data(self, file_path: str) -> ProcessingResult:
         """导出更新后的原始数据"""
-        export_data = self.updated_data if self.updated_data is not None else self.original_data
-        
-        if export_data is None:
+        if self.original_data is None:
             return ProcessingResult(
                 success=False,
                 message="没有可导出的数据"
             )
+
+        export_data = self._get_full_original_data()
+        match_report = None
+        if self.updated_data is not None:
+            match_report = self.match_report
+            # 把改价结果列拼接到完整宽度的原始数据上
+            export_data = export_data.copy()
+            for col in self.updated_data.columns:
+                if col not in export_data.columns:
+                    export_data[col] = self.updated_data[col].to_numpy()
         
-        return self.excel_service.export_original_data(file_path, export_data)
+        return self.excel_service.export_original_data(file_path, export_data, match_report)
+
+    def _get_full_original_data(self) -> Optional[pd.DataFrame]:
+        """获取完整宽度的原始数据，首次需要时才重新读取源文件"""
+        if self.original_data is None or self.source_file_path is None:
+            return self.original_data
+
+        if self._full_original_data is None:
+            try:
+                full_data = self.data_service.import_excel_data(self.source_file_path)
+            except Exception as e:
+                logger.warning(f"重新读取完整原始数据失败，将导出已读取的列: {e}")
+                return self.original_data
+
+            if len(full_data) != len(self.original_data):
+                logger.warning("源文件已发生变化，将导出已读取的列")
+                return self.original_data
+            for col in self._edited_columns:
+                full_data[col] = self.original_data[col].to_numpy()
+            self._full_original_data = full_data
+
+        return self._full_original_data
 
     def get_data_summary(self) -> dict:
         """获取数据摘要"""
@@ -49,14 +49,26 @@ a = Analysis(
         'gui.main_window',
         'core.data_extractor',
         'core.data_filter',
+        'core.dataset_stats',
+        'core.filter_rules',
         'core.profit_calculator',
         'core.price_matcher',
+        'core.pricing_simulator',
+        'core.parse_store',
         'core.table_format_analyzer',
         'processors.data_processor',
         'services.data_service',
         'services.excel_service',
+        'services.incremental_profit_table',
         'exporters.excel_exporter',
+        'importers.excel_importer',
+        'importers.import_cache',
         'utils.logger',
+        'utils.categorical',
+        'utils.aho_corasick',
+        'utils.numeric',
+        'utils.match_keys',
+        'utils.ngram_index',
         'models',
         'app',
         'cli',
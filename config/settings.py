@@ -24,14 +24,53 @@ EXCEL_CONFIG = {
     "currency_format": '"¥"#,##0.00'
 }
 
+# 导入配置
+IMPORT_CONFIG = {
+    "chunk_size": 50000  # 流式导入时每块的行数
+}
+
+# 并行提取配置：去重后的（简称, 分类）组合较多时，分片交给进程池解析
+PARALLEL_CONFIG = {
+    "enabled": True,
+    "max_workers": None,  # 工作进程数，None 表示使用全部CPU核数
+    "min_unique_pairs": 200000  # 组合数低于此值时串行解析（启动进程的开销大于收益）
+}
+
+# 增量毛利表配置：原始数据修改少量行后只重建受影响的配置颜色组合
+INCREMENTAL_CONFIG = {
+    "enabled": True,
+    "max_changed_ratio": 0.05  # 修改的行数超过总行数的此比例时全量重新生成
+}
+
+# 导入缓存配置：以文件内容哈希为键缓存解析结果，重复导入同一文件时直接读取缓存
+IMPORT_CACHE_CONFIG = {
+    "enabled": True,
+    "cache_dir": DATA_DIR / "import_cache",
+    "max_size_mb": 1024  # 缓存总大小上限，超出后淘汰最久未使用的条目
+}
+
+# 简称解析结果存储：按（简称, 分类, 提取规则版本）保存解析结果，下次启动只解析新出现的简称
+PARSE_STORE_CONFIG = {
+    "enabled": True,
+    "db_path": DATA_DIR / "parse_store.sqlite3"
+}
+
 # 数据处理配置
 DATA_PROCESSING_CONFIG = {
     "size_patterns": [r'20寸', r'22寸', r'24寸', r'26寸', r'27\.5寸', r'28寸', r'29寸'],
     "speed_pattern": r'(\d+速)',
-    "color_patterns": [r'黑', r'白', r'红', r'蓝', r'绿', r'黄', r'灰', r'银', r'金', r'粉', r'紫', r'橙'],
+    # 颜色词表（按字面匹配），可加入任意多的颜色名，组合色（如"黑红"）也直接列出
+    "color_patterns": [
+        '黑', '白', '红', '蓝', '绿', '黄', '灰', '银', '金', '粉', '紫', '橙', '渐变色',
+        '黑红', '黑白', '黑蓝', '黑绿', '黑黄', '黑橙', '黑灰', '白红', '白蓝', '白绿', '白灰',
+        '红黑', '红白', '蓝黑', '蓝白', '绿黑', '黄黑', '橙黑', '灰黑'
+    ],
+    # 含颜色字但不是颜色的词（如"铝合金"中的"金"），匹配到这些词时不计为颜色
+    "color_stopwords": ['合金', '金属'],
     "default_size": "26寸",
     "default_speed": "21速",
     "default_color": "渐变色",
+    "name_cache_size": 4096,  # 单个简称解析结果的缓存条数（最近使用的优先保留）
     "price_adjustments": {
         "20寸": -40,
         "22寸": -20,
@@ -43,6 +82,48 @@ DATA_PROCESSING_CONFIG = {
     }
 }
 
+# 筛选规则配置：DataFilter 按顺序执行，每条规则记录耗时和删除的行数
+# overrides 在全部数据上修正取值；selection 在有配置的行上逐步筛选
+FILTER_RULES_CONFIG = {
+    "overrides": [
+        # 分类包含关键字且没有尺寸的产品使用默认尺寸（促销款默认26寸）
+        {"type": "category_default_size", "name": "促销款默认尺寸",
+         "category_keyword": "促销", "size": DATA_PROCESSING_CONFIG["default_size"]},
+    ],
+    "selection": [
+        # 每个配置颜色组合只保留一个尺寸：按 sizes 顺序优先，都没有时取成本最高的尺寸（尺寸格式下不筛选）
+        {"type": "preferred_size", "name": "尺寸优先",
+         "sizes": [DATA_PROCESSING_CONFIG["default_size"]], "tiebreak": "max_cost", "skip_in_size_format": True},
+        # 每个配置、尺寸、速别只保留价格最低的一行
+        {"type": "min_price", "name": "最低价", "group_by": ["配置", "尺寸", "速别"]},
+    ]
+}
+
+# 毛利表配置：金额和毛利率列内部保存为浮点数（毛利率为小数），只在界面显示和Excel单元格格式中格式化
+PROFIT_TABLE_CONFIG = {
+    "express_fee": 30.0,  # 每单快递费
+    "amount_columns": ['价格', '成本', '快递', '毛利润'],
+    "rate_columns": ['毛利率'],
+    "amount_format": '0.00',  # Excel 金额单元格格式
+    "rate_format": '0.00%'  # Excel 毛利率单元格格式
+}
+
+# 改价匹配报告配置：日志只记录汇总和部分未匹配行，逐行结果保存在匹配报告中
+MATCH_REPORT_CONFIG = {
+    "unmatched_log_sample": 20,  # 日志中列出的未匹配行数
+    "export_sheet": True,  # 导出改价后原始数据时附带匹配报告工作表
+    "sheet_name": "匹配报告"
+}
+
+# 模糊匹配配置：三级匹配都失败的行，按字符 n-gram 相似度在毛利表中查找最相似的匹配键
+FUZZY_MATCH_CONFIG = {
+    "enabled": False,
+    "ngram": 2,  # n-gram 长度（字符数）
+    "min_score": 0.85,  # 相似度（0~1）不低于此值时才采用，低于此值只在匹配报告中给出建议
+    "max_candidates": 50,  # 每行最多精确打分的候选数
+    "common_ratio": 0.05  # 出现在超过此比例的匹配键中的 n-gram 不用于选取候选
+}
+
 # UI 配置
 UI_CONFIG = {
     "window_title": "毛利表生成器",
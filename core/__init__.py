@@ -5,11 +5,13 @@
 from .data_extractor import DataExtractor
 from .data_filter import DataFilter
 from .price_matcher import PriceMatcher
+from .pricing_simulator import PricingSimulator
 from .profit_calculator import ProfitCalculator
 
 __all__ = [
     'DataExtractor',
     'DataFilter', 
     'PriceMatcher',
+    'PricingSimulator',
     'ProfitCalculator'
 ]
\ No newline at end of file
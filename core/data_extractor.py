@@ -2,218 +2,322 @@
 数据提取器 - 从商品名称中提取配置、尺寸、速别等信息
 """
 
+import hashlib
 import re
 import pandas as pd
-from typing import List, Tuple, Optional
+import numpy as np
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional, Tuple
 import sys
 import os
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config.settings import DATA_PROCESSING_CONFIG
+from utils.aho_corasick import AhoCorasick
+
 try:
     from utils.logger import logger
 except ImportError:
     import logging
     logger = logging.getLogger(__name__)
 
+# 提取逻辑版本，代码中的解析规则变化时递增，使已保存的解析结果失效
+EXTRACTION_RULES_VERSION = 1
+
+# 速别编码：数字速别为速数，单速、变速及无法换算的速别使用固定编码，排序时依次排在后面
+EMPTY_SPEED_CODE = -1
+SINGLE_SPEED_CODE = 0
+VARIABLE_SPEED_CODE = 998
+UNKNOWN_SPEED_CODE = 999
+# 速别编码以 int32 存储，超出范围的速数按无法换算处理
+MAX_SPEED_CODE = np.iinfo(np.int32).max
+
+CHINESE_DIGITS = {'零': 0, '一': 1, '二': 2, '两': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+CHINESE_UNITS = {'十': 10, '百': 100, '千': 1000, '万': 10000}
+
+
+def chinese_numeral_to_int(text: str) -> Optional[int]:
+    """把中文数字（如"二十一"、"十二"）转换为整数，包含其他字符或百、千、万前面没有数字时返回None"""
+    if not text:
+        return None
+    total = section = 0
+    number = None
+    for char in text:
+        if char in CHINESE_DIGITS:
+            number = CHINESE_DIGITS[char]
+        elif char in CHINESE_UNITS:
+            unit = CHINESE_UNITS[char]
+            if unit == 10000:
+                if number is None and section == 0:
+                    return None
+                total += (section + (number or 0)) * unit
+                section = 0
+            elif number is None and unit != 10:
+                return None
+            else:
+                # "十二"中的"十"前面省略了"一"
+                section += (1 if number is None else number) * unit
+            number = None
+        else:
+            return None
+    return total + section + (number or 0)
+
+
+def speed_to_code(speed) -> int:
+    """把速别文字转换为整数编码，如"21速"、"二十一速"为21，单速为0，变速为998，其余（包括超出 int32 范围的速数）为999"""
+    if pd.isna(speed) or speed == '':
+        return EMPTY_SPEED_CODE
+    speed = str(speed)
+    if speed == '单速':
+        return SINGLE_SPEED_CODE
+    if speed == '变速':
+        return VARIABLE_SPEED_CODE
+
+    value = speed[:-1] if speed.endswith('速') else speed
+    if value.isascii() and value.isdigit():
+        number = int(value)
+    else:
+        number = chinese_numeral_to_int(value)
+    return UNKNOWN_SPEED_CODE if number is None or number > MAX_SPEED_CODE else number
+
+
+class NameTokens(NamedTuple):
+    """简称扫描结果，位置均为 (起始, 结束) 偏移，未找到时为None"""
+    size: Optional[Tuple[int, int]]
+    speed: Optional[Tuple[int, int]]
+    colors: List[Tuple[int, int]]
+    category: Optional[Tuple[int, int]]
+
 
 class DataExtractor:
     """数据提取器类，负责从商品名称中提取各种信息"""
-    
-    def __init__(self):
+
+    # 提取信息时读取的原始数据列
+    required_columns = ['简称', '分类']
+
+    # 提取生成的列，取值重复度高，以分类类型存储
+    extracted_columns = ['提取的分类', '配置', '尺寸', '速别', '颜色']
+
+    def __init__(self, parse_store=None):
         # 使用动态正则表达式识别所有数字+寸的格式
         self.size_pattern = r'(\d+(?:\.\d+)?寸)'  # 匹配整数或小数+寸，如：20寸、27.5寸
         self.speed_pattern = r'(\d+速)'
-        self.color_patterns = [r'黑', r'白', r'红', r'蓝', r'绿', r'黄', r'灰', r'银', r'金', r'粉', r'紫', r'橙']
+        # 速别：速字前面的数字或汉字（包括"变"字等其他汉字）
+        speed_chars = r'[0-9一二三四五六七八九十百千万变内外前后高低快慢多少]'
+        # 尺寸、速别合并为一个预编译的扫描模式，一次从左到右扫描取出全部标记；
+        # 两类标记的字符互不重叠，扫描结果与分别查找时一致
+        self.token_pattern = re.compile(
+            r'(?P<size>\d+(?:\.\d+)?寸)'
+            rf'|(?P<speed>{speed_chars}+速)'
+        )
+        # 颜色按词表匹配，词表可能很大，使用 Aho-Corasick 自动机一次扫描；
+        # 排除词一起放入自动机，重叠时起点靠前的长词优先，从而遮住其中的颜色字
+        self.color_patterns = list(DATA_PROCESSING_CONFIG["color_patterns"])
+        self.color_stopwords = frozenset(DATA_PROCESSING_CONFIG["color_stopwords"])
+        self.color_matcher = AhoCorasick(self.color_patterns + list(self.color_stopwords))
+        # 单个简称的解析结果缓存（有容量上限），提取速别、尺寸时共用
+        self._parse_name = lru_cache(maxsize=DATA_PROCESSING_CONFIG["name_cache_size"])(self._parse_name_uncached)
+        # 可选的持久化解析结果存储（ParseStore），为None时每次都重新解析
+        self.parse_store = parse_store
+        self.rules_version = self._build_rules_version()
+
+    def _build_rules_version(self) -> str:
+        """由提取逻辑版本和扫描模式、颜色词表计算规则版本，任一变化都会得到新版本"""
+        digest = hashlib.blake2b(digest_size=12)
+        for part in [str(EXTRACTION_RULES_VERSION), self.token_pattern.pattern,
+                     *self.color_patterns, '|', *sorted(self.color_stopwords)]:
+            digest.update(part.encode('utf-8') + b'\x00')
+        return digest.hexdigest()
+
+    def scan_name(self, name: str, category: Optional[str] = None) -> NameTokens:
+        """扫描简称，返回第一个尺寸、第一个速别、全部颜色及分类的位置"""
+        size = speed = None
+        for match in self.token_pattern.finditer(name):
+            if match.lastgroup == 'size':
+                if size is None:
+                    size = match.span()
+            elif speed is None:
+                speed = match.span()
+        colors = [(start, end) for start, end in self.color_matcher.find_all(name)
+                  if name[start:end] not in self.color_stopwords]
+
+        category_span = None
+        if category is not None:
+            category_start = name.find(category)
+            if category_start >= 0:
+                category_span = (category_start, category_start + len(category))
+
+        return NameTokens(size, speed, colors, category_span)
 
     def extract_info_from_name(self, df: pd.DataFrame) -> pd.DataFrame:
-        """从简称中提取分类、配置、尺寸、速别信息"""
-        # 新增列
-        df['提取的分类'] = ''
-        df['配置'] = ''
-        df['尺寸'] = ''
-        df['速别'] = ''
-        df['颜色'] = ''
-
-        for index, row in df.iterrows():
-            name = str(row.get('简称', ''))
-            category = str(row.get('分类', ''))
+        """从简称中提取分类、配置、尺寸、速别、颜色信息
 
+        同一（简称, 分类）组合在不同SKU、颜色行中大量重复，因此先对组合去重，每个组合只扫描一次，
+        再按组合编号把结果取回到每一行。
+        """
+        pair_codes, names, categories = self.factorize_pairs(df)
+        return self.assign_extracted(df, pair_codes, self.resolve_pairs(names, categories))
+
+    def factorize_pairs(self, df: pd.DataFrame) -> Tuple[np.ndarray, List[str], List[str]]:
+        """对（简称, 分类）组合去重，返回（每行的组合编号, 各组合的简称, 各组合的分类），按首次出现顺序编号"""
+        name_codes, name_values = self._factorize_as_str(df, '简称')
+        category_codes, category_values = self._factorize_as_str(df, '分类')
+
+        pair_keys = name_codes * len(category_values) + category_codes
+        pair_codes, unique_keys = pd.factorize(pair_keys)
+        names = [name_values[key] for key in unique_keys // len(category_values)]
+        categories = [category_values[key] for key in unique_keys % len(category_values)]
+        return pair_codes, names, categories
+
+    def assign_extracted(self, df: pd.DataFrame, pair_codes: np.ndarray, extracted: dict) -> pd.DataFrame:
+        """把按组合解析的结果按组合编号取回到每一行，并生成整数速别编码"""
+        # 提取列取值重复度高，以分类类型存储
+        for col in self.extracted_columns:
+            df[col] = pd.Categorical(extracted[col]).take(pair_codes)
+
+        # 速别编码只需对每个不同的速别换算一次，再按分类编码取值
+        speed_codes = np.array([speed_to_code(speed) for speed in df['速别'].cat.categories], dtype=np.int32)
+        df['速别编码'] = speed_codes[df['速别'].cat.codes.to_numpy()]
+        return df
+
+    def _factorize_as_str(self, df: pd.DataFrame, col: str) -> Tuple[np.ndarray, List[str]]:
+        """对一列编码，返回（每行编号, 各编号对应的字符串）；缺失列视为空字符串"""
+        if col not in df.columns:
+            return np.zeros(len(df), dtype=np.int64), ['']
+        values = df[col]
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        uniques = np.asarray(uniques, dtype=object)
+        if not all(isinstance(value, str) for value in uniques):
+            # 混有数字、空值等时，1 与 1.0、None 与 nan 会被编为同一个值，但转成字符串后不同，
+            # 这种情况先逐个转为字符串再编码
+            codes, uniques = pd.factorize(np.array([str(value) for value in values.tolist()], dtype=object))
+        return np.asarray(codes, dtype=np.int64), [str(value) for value in uniques]
+
+    def resolve_pairs(self, names: List[str], categories: List[str],
+                      parse: Optional[Callable[[List[str], List[str]], dict]] = None) -> dict:
+        """取得各组合的提取结果：已保存的直接读取，只有未见过的组合交给 parse 解析并保存
+
+        Args:
+            names, categories: 互不重复的（简称, 分类）组合
+            parse: 解析函数，默认为 parse_pairs
+        """
+        parse = parse or self.parse_pairs
+        # 没有存储或存储已关闭时直接解析全部组合
+        if self.parse_store is None or not self.parse_store.enabled:
+            return parse(names, categories)
+
+        known = self.parse_store.load(self.rules_version)
+        pairs = list(zip(names, categories))
+        values = [known.get(pair) for pair in pairs]
+        missing = [i for i, value in enumerate(values) if value is None]
+
+        if missing:
+            parsed = parse([names[i] for i in missing], [categories[i] for i in missing])
+            parsed_values = list(zip(*(parsed[col] for col in self.extracted_columns)))
+            for i, value in zip(missing, parsed_values):
+                values[i] = value
+            self.parse_store.save(self.rules_version, [pairs[i] for i in missing], parsed_values)
+        logger.info(f"简称解析：{len(pairs)}个组合，其中{len(missing)}个为新组合")
+
+        columns = list(zip(*values)) if values else [()] * len(self.extracted_columns)
+        return {col: list(column) for col, column in zip(self.extracted_columns, columns)}
+
+    def parse_pairs(self, names: List[str], categories: List[str]) -> dict:
+        """解析互不重复的（简称, 分类）组合，返回各提取列的取值列表"""
+        extracted = {col: [] for col in self.extracted_columns}
+        for name, category in zip(names, categories):
+            # 简称为空的行不提取
             if not name or name == 'nan':
+                for values in extracted.values():
+                    values.append('')
                 continue
 
-            # 提取分类
-            df.at[index, '提取的分类'] = category
-
-            # 查找尺寸
-            size_match = None
-            size_start = -1
-            size_end = -1
-
-            match = re.search(self.size_pattern, name)
-            if match:
-                size_match = match.group(1)  # 获取捕获组中的尺寸
-                size_start = match.start()
-                size_end = match.end()
-
-            # 查找速别 - 使用新的提取逻辑
-            speed_text = self.extract_speed_from_name(name)
-            df.at[index, '速别'] = speed_text
-            
-            # 为了保持原有逻辑，仍需要找到速别在字符串中的位置
-            speed_start = -1
-            speed_end = -1
-            speed_match = None
-            if speed_text and speed_text != "单速":
-                # 查找速别在原字符串中的位置
-                speed_pattern_for_position = re.escape(speed_text)
-                speed_match = re.search(speed_pattern_for_position, name)
-                if speed_match:
-                    speed_start = speed_match.start()
-                    speed_end = speed_match.end()
-
-            if size_match:
-                df.at[index, '尺寸'] = size_match
-                
-                # 构建配置名：除了分类、尺寸、速别外的所有文字
-                config_parts = []
-                
-                # 分类前的部分
-                if category in name:
-                    category_start = name.find(category)
-                    if category_start > 0:
-                        before_category = name[:category_start].strip()
-                        if before_category:
-                            config_parts.append(before_category)
-                    
-                    # 分类后到尺寸前的部分
-                    category_end = category_start + len(category)
-                    between_part = name[category_end:size_start].strip()
-                    if between_part:
-                        config_parts.append(between_part)
-                else:
-                    # 没有分类，取尺寸前的部分
-                    before_size = name[:size_start].strip()
-                    if before_size:
-                        config_parts.append(before_size)
-                
-                # 尺寸后的部分（排除速别）
-                after_size = name[size_end:].strip()
-                if after_size:
-                    if speed_match and speed_start >= size_end:
-                        # 尺寸后到速别前的部分
-                        between_size_speed = name[size_end:speed_start].strip()
-                        if between_size_speed:
-                            config_parts.append(between_size_speed)
-                        
-                        # 速别后的部分
-                        after_speed = name[speed_end:].strip()
-                        if after_speed:
-                            config_parts.append(after_speed)
-                    else:
-                        # 没有速别或速别在尺寸前，直接添加尺寸后的部分
-                        config_parts.append(after_size)
-                
-                # 拼接配置名
-                df.at[index, '配置'] = ''.join(config_parts)
+            tokens = self.scan_name(name, category)
+            extracted['提取的分类'].append(category)
+            extracted['配置'].append(self._compose_config(name, tokens))
+            extracted['尺寸'].append(name[tokens.size[0]:tokens.size[1]] if tokens.size else '')
+            # 没有匹配到速别时默认为单速
+            extracted['速别'].append(name[tokens.speed[0]:tokens.speed[1]] if tokens.speed else '单速')
+            extracted['颜色'].append(self._color_from_tokens(name, tokens))
+        return extracted
+
+    def _color_from_tokens(self, name: str, tokens: NameTokens) -> str:
+        """取最长的颜色词（如"渐变色"、"黑红"），长度相同时取靠前的"""
+        if not tokens.colors:
+            return ''
+        start, end = max(tokens.colors, key=lambda span: (span[1] - span[0], -span[0]))
+        return name[start:end]
+
+    def _compose_config(self, name: str, tokens: NameTokens) -> str:
+        """构建配置名：除了分类、尺寸、速别外的所有文字
+
+        配置名由至多四段文字拼接而成（每段去掉首尾空白）：
+        分类前、分类后到尺寸（或速别）前、尺寸后到速别前、速别后。
+        """
+        size, speed, category = tokens.size, tokens.speed, tokens.category
+        # 尺寸、速别都没有时取到简称末尾
+        body_start = size[0] if size else (speed[0] if speed else len(name))
+
+        if category:
+            config = name[:category[0]].strip() + name[category[1]:body_start].strip()
+        else:
+            config = name[:body_start].strip()
 
+        if size:
+            if speed and speed[0] >= size[1]:
+                config += name[size[1]:speed[0]].strip() + name[speed[1]:].strip()
             else:
-                # 如果没有尺寸信息，整个简称（除了分类和速别）都是配置
-                config_parts = []
-                
-                if category in name:
-                    # 分类前的部分
-                    category_start = name.find(category)
-                    if category_start > 0:
-                        before_category = name[:category_start].strip()
-                        if before_category:
-                            config_parts.append(before_category)
-                    
-                    # 分类后的部分（排除速别）
-                    category_end = category_start + len(category)
-                    after_category = name[category_end:].strip()
-                    
-                    if speed_match:
-                        if speed_start > category_end:
-                            # 分类后到速别前的部分
-                            between_part = name[category_end:speed_start].strip()
-                            if between_part:
-                                config_parts.append(between_part)
-                        
-                        # 速别后的部分
-                        after_speed = name[speed_end:].strip()
-                        if after_speed:
-                            config_parts.append(after_speed)
-                    else:
-                        # 没有速别，直接添加分类后的部分
-                        if after_category:
-                            config_parts.append(after_category)
-                else:
-                    # 没有分类，整个简称（除了速别）都是配置
-                    if speed_match:
-                        # 速别前的部分
-                        before_speed = name[:speed_start].strip()
-                        if before_speed:
-                            config_parts.append(before_speed)
-                        
-                        # 速别后的部分
-                        after_speed = name[speed_end:].strip()
-                        if after_speed:
-                            config_parts.append(after_speed)
-                    else:
-                        # 没有速别，整个简称都是配置
-                        config_parts.append(name.strip())
-                
-                # 拼接配置名
-                df.at[index, '配置'] = ''.join(config_parts)
-        
-        return df
+                config += name[size[1]:].strip()
+        elif speed:
+            config += name[speed[1]:].strip()
+
+        return config
 
     def extract_config_from_name(self, name: str, category: str) -> str:
         """从商品简称中提取配置"""
-        match = re.search(self.size_pattern, name)
-        if match and category in name:
-            category_end = name.find(category) + len(category)
-            size_start = match.start()
-            config = name[category_end:size_start]
-            return config
+        tokens = self.scan_name(name, category)
+        if tokens.size and tokens.category:
+            return name[tokens.category[1]:tokens.size[0]]
         return ''
 
     def extract_speed_from_name(self, name: str) -> str:
         """从商品简称中提取速别
-        
+
         规则：
         1. 查找"速"字前面的数字或汉字
         2. 如果没有"速"字，默认为"单速"
         """
         if pd.isna(name) or not name or name == 'nan':
             return "单速"
-        
-        name = str(name)
-        
-        # 查找"速"字
-        if '速' not in name:
-            return "单速"
-        
-        # 查找"速"字前面的数字或汉字
-        # 匹配模式：数字+速 或 汉字+速（包括"变"字等其他汉字）
-        speed_match = re.search(r'([0-9一二三四五六七八九十百千万变内外前后高低快慢多少]+)速', name)
-        if speed_match:
-            speed_value = speed_match.group(1)
-            return f"{speed_value}速"
-        
-        # 如果有"速"字但没有匹配到前面的数字或汉字，默认为单速
-        return "单速"
+
+        return self._parse_name(str(name))[1]
 
     def extract_size_from_name(self, name: str) -> str:
         """从商品简称中提取尺寸"""
-        match = re.search(self.size_pattern, name)
-        if match:
-            return match.group(1)  # 返回捕获组中的内容
-        return ''
+        return self._parse_name(name)[0]
+
+    def _parse_name_uncached(self, name: str) -> Tuple[str, str]:
+        """解析单个简称，返回（尺寸, 速别），没有速别时默认为单速"""
+        tokens = self.scan_name(name)
+        size = name[tokens.size[0]:tokens.size[1]] if tokens.size else ''
+        speed = name[tokens.speed[0]:tokens.speed[1]] if tokens.speed else "单速"
+        return size, speed
 
     def remove_size_from_name(self, name: str) -> str:
         """从商品简称中移除尺寸信息"""
         # 不再移除尺寸信息，保持原始名称
-        return name
\ No newline at end of file
+        return name
+
+
+# 进程池中每个工作进程各自持有一个提取器，首次调用时创建
+_worker_extractor: Optional[DataExtractor] = None
+
+
+def parse_pairs_in_worker(names: List[str], categories: List[str]) -> dict:
+    """在工作进程中解析一批（简称, 分类）组合，供进程池并行提取使用"""
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = DataExtractor()
+    return _worker_extractor.parse_pairs(names, categories)
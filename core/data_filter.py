@@ -3,7 +3,7 @@
 """
 
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import sys
 import os
 
@@ -16,102 +16,36 @@ except ImportError:
     import logging
     logger = logging.getLogger(__name__)
 
+from core.dataset_stats import DatasetStats
+from core.filter_rules import COMBO_ID_COLUMN, FilterRuleEngine
+from utils.categorical import combine_columns
+
 
 class DataFilter:
     """数据筛选器类，负责应用各种数据筛选规则"""
+
+    # 筛选时读取的原始数据列（配置、尺寸、速别、颜色由提取器生成）
+    required_columns = ['分类', '价格', '成本']
     
-    def __init__(self):
-        pass
+    def __init__(self, rules_config: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        # 筛选规则在配置中声明（FILTER_RULES_CONFIG），创建时编译一次
+        self.rule_engine = FilterRuleEngine(rules_config)
 
-    def apply_data_filtering_rules(self, df: pd.DataFrame, use_size_format: bool = False) -> pd.DataFrame:
+    def apply_data_filtering_rules(self, df: pd.DataFrame, use_size_format: bool = False,
+                                   stats: Optional[DatasetStats] = None) -> pd.DataFrame:
         """应用数据筛选规则
         
         Args:
             df: 输入数据
             use_size_format: 是否使用尺寸格式，如果为True则不进行尺寸筛选
+            stats: df 的统计上下文，规则直接读取其中已统计的列
         """
         try:
-            filtered_data = []
-
-            # 确保必要的列存在
-            required_cols = ['配置', '颜色', '尺寸', '速别', '价格', '成本']
-            for col in required_cols:
-                if col not in df.columns:
-                    df[col] = ''
-
-            # 为促销款产品设置默认尺寸
-            if '分类' in df.columns:
-                for index, row in df.iterrows():
-                    if (pd.isna(row.get('尺寸')) or row.get('尺寸') == '') and '促销' in str(row.get('分类', '')):
-                        df.at[index, '尺寸'] = '26寸'
-
-            # 创建配置+颜色的组合键
-            df['配置颜色组合'] = df['配置'].fillna('') + df['颜色'].fillna('')
-            config_color_combos = df['配置颜色组合'].unique()
-
-            for combo in config_color_combos:
-                if pd.isna(combo) or combo == '':
-                    continue
-
-                config_data = df[df['配置颜色组合'] == combo].copy()
-
-                # 规则2：如果不是尺寸格式，才进行尺寸筛选
-                if not use_size_format:
-                    # 所有配置只保留26寸的数据
-                    if '26寸' in config_data['尺寸'].values:
-                        config_data_26 = config_data[config_data['尺寸'] == '26寸']
-                        if not config_data_26.empty:
-                            config_data = config_data_26
-                    else:
-                        # 如果没有26寸，选择成本最高的尺寸
-                        if '成本' in config_data.columns and not config_data['成本'].empty:
-                            try:
-                                config_data['成本数值'] = pd.to_numeric(config_data['成本'], errors='coerce')
-                                size_max_costs = config_data.groupby('尺寸')['成本数值'].max()
-                                if not size_max_costs.empty:
-                                    max_cost_size = size_max_costs.idxmax()
-                                    config_data = config_data[config_data['尺寸'] == max_cost_size]
-                            except:
-                                first_size = config_data['尺寸'].iloc[0] if not config_data['尺寸'].empty else ''
-                                if first_size:
-                                    config_data = config_data[config_data['尺寸'] == first_size]
-
-                # 规则4：选择最低价格的数据
-                if '价格' in config_data.columns and not config_data.empty:
-                    if use_size_format:
-                        # 尺寸格式：按配置、尺寸、速别分组（保留不同速别的数据）
-                        grouped = config_data.groupby(['配置', '尺寸', '速别'])
-                    else:
-                        # 速别格式：按配置、尺寸、速别分组
-                        grouped = config_data.groupby(['配置', '尺寸', '速别'])
-                    
-                    for group_key, group_data in grouped:
-                        if len(group_data) > 1:
-                            try:
-                                group_data['价格数值'] = pd.to_numeric(group_data['价格'], errors='coerce')
-                                min_price = group_data['价格数值'].min()
-                                min_price_data = group_data[group_data['价格数值'] == min_price]
-                                selected_row = min_price_data.iloc[0]
-                            except:
-                                selected_row = group_data.iloc[0]
-                        else:
-                            selected_row = group_data.iloc[0]
-                        
-                        filtered_data.append(selected_row)
-                else:
-                    for _, row in config_data.iterrows():
-                        filtered_data.append(row)
+            df, selected = self._select(df, use_size_format, stats)
 
             # 转换为DataFrame
-            if filtered_data:
-                result_df = pd.DataFrame(filtered_data)
-                result_df = result_df.reset_index(drop=True)
-                # 删除临时列
-                cols_to_drop = ['配置颜色组合', '成本数值', '价格数值']
-                for col in cols_to_drop:
-                    if col in result_df.columns:
-                        result_df = result_df.drop(columns=[col])
-                return result_df
+            if not selected.empty:
+                return selected
             else:
                 if '配置颜色组合' in df.columns:
                     df = df.drop(columns=['配置颜色组合'])
@@ -123,4 +57,41 @@ class DataFilter:
             for col in cols_to_drop:
                 if col in df.columns:
                     df = df.drop(columns=[col])
-            return df
\ No newline at end of file
+            return df
+
+    def select_rows(self, df: pd.DataFrame, use_size_format: bool = False,
+                    stats: Optional[DatasetStats] = None) -> pd.DataFrame:
+        """执行取值修正和筛选规则，只返回选中的行（没有选中的行时为空，不回退为全部数据）
+
+        各配置颜色组合的筛选互不影响，对部分组合的行单独筛选，结果与整表筛选中这些组合的结果一致。
+        """
+        return self._select(df, use_size_format, stats)[1]
+
+    def _select(self, df: pd.DataFrame, use_size_format: bool, stats: Optional[DatasetStats]):
+        """返回（取值修正后的数据，按筛选结果顺序排列的选中行）"""
+        # 按行号选取结果行，保留各列（包括分类类型列）的数据类型
+        df = df.reset_index(drop=True)
+
+        # 确保必要的列存在
+        required_cols = ['配置', '颜色', '尺寸', '速别', '价格', '成本']
+        for col in required_cols:
+            if col not in df.columns:
+                df[col] = ''
+
+        # 取值修正规则（如促销款产品设置默认尺寸）
+        df = self.rule_engine.apply_overrides(df, use_size_format, stats)
+
+        # 创建配置+颜色的组合键（分类类型，只对出现过的组合拼接字符串）
+        df['配置颜色组合'] = combine_columns(df['配置'], df['颜色'])
+        # 组合按首次出现的顺序编号，空组合不参与筛选
+        combo_ids = pd.Series(pd.factorize(df['配置颜色组合'])[0], index=df.index)
+        in_combo = df['配置颜色组合'].notna() & (df['配置颜色组合'] != '')
+        candidates = df[in_combo].assign(**{COMBO_ID_COLUMN: combo_ids[in_combo]})
+
+        # 筛选规则（如尺寸优先、最低价），尺寸格式下跳过标记了 skip_in_size_format 的规则
+        selected = self.rule_engine.apply_selection(candidates, use_size_format)
+
+        # 删除临时列
+        result_df = df.loc[selected.index].reset_index(drop=True)
+        result_df = result_df.drop(columns=['配置颜色组合'])
+        return df, result_df
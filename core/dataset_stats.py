@@ -0,0 +1,65 @@
+"""
+数据统计上下文 - 一次生成毛利表的过程中共享的列取值统计
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class DatasetStats:
+    """数据统计上下文，按列缓存取值计数
+
+    格式分析、筛选、毛利计算各环节都从这里读取尺寸、速别、配置、分类的取值，
+    每列只扫描一次。统计对应创建时传入的数据，数据变化后需要新建。
+    """
+
+    # profile 一次统计的列
+    profiled_columns = ['尺寸', '速别', '配置', '分类']
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.row_count = len(df)
+        self._value_counts: Dict[str, pd.Series] = {}
+
+    def profile(self, columns: Optional[List[str]] = None) -> 'DatasetStats':
+        """统计各列的取值计数并缓存，返回自身"""
+        for col in columns or self.profiled_columns:
+            self.value_counts(col)
+        return self
+
+    def value_counts(self, col: str) -> pd.Series:
+        """列的取值计数，按取值首次出现的顺序排列，不含空值（NaN）；列不存在时为空"""
+        if col not in self._value_counts:
+            self._value_counts[col] = self._count_values(col)
+        return self._value_counts[col]
+
+    def unique_values(self, col: str, skip_empty: bool = True) -> list:
+        """列中出现过的取值（按首次出现的顺序），skip_empty 时去掉空字符串和空白"""
+        values = self.value_counts(col).index.tolist()
+        if skip_empty:
+            values = [value for value in values if value and str(value).strip() != '']
+        return values
+
+    def _count_values(self, col: str) -> pd.Series:
+        """扫描一列：分类类型直接使用分类编码，其他类型先编码再计数"""
+        if col not in self.df.columns:
+            return pd.Series([], dtype=np.int64)
+
+        series = self.df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            categories = series.cat.categories
+        else:
+            codes, categories = pd.factorize(series)
+
+        valid_codes = codes[codes >= 0]
+        seen_codes = pd.unique(valid_codes)
+        counts = np.bincount(valid_codes, minlength=len(categories))
+        return pd.Series(counts[seen_codes], index=pd.Index(np.asarray(categories, dtype=object)[seen_codes],
+                                                            dtype=object, name=col))
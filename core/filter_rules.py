@@ -0,0 +1,200 @@
+"""
+筛选规则引擎 - 把配置中声明的筛选规则编译为按整表执行的向量化操作
+"""
+
+import time
+import pandas as pd
+import numpy as np
+from typing import Any, Dict, List, Optional
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import FILTER_RULES_CONFIG
+
+try:
+    from utils.logger import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+from core.dataset_stats import DatasetStats
+from utils.categorical import add_categories
+
+# 组合序号列：配置颜色组合按首次出现顺序的编号，由 DataFilter 在筛选前生成
+COMBO_ID_COLUMN = '组合序号'
+
+
+class FilterRule:
+    """筛选规则基类，apply 对整表执行并返回结果"""
+
+    rule_type = ''
+
+    def __init__(self, name: Optional[str] = None, skip_in_size_format: bool = False):
+        self.name = name or self.rule_type
+        self.skip_in_size_format = skip_in_size_format
+
+    def apply(self, df: pd.DataFrame, stats: Optional[DatasetStats] = None) -> pd.DataFrame:
+        """执行规则，stats 为输入数据的统计上下文（可能为None）"""
+        raise NotImplementedError
+
+
+class CategoryDefaultSizeRule(FilterRule):
+    """分类覆盖规则：分类包含关键字且尺寸为空的行，尺寸设为指定值（如促销款默认26寸）"""
+
+    rule_type = 'category_default_size'
+
+    def __init__(self, category_keyword: str, size: str, **kwargs):
+        super().__init__(**kwargs)
+        self.category_keyword = category_keyword
+        self.size = size
+
+    def apply(self, df: pd.DataFrame, stats: Optional[DatasetStats] = None) -> pd.DataFrame:
+        if '分类' not in df.columns:
+            return df
+        missing_size = df['尺寸'].isna() | (df['尺寸'] == '')
+        # 只对不同的分类判断是否包含关键字，再按分类取值匹配
+        categories = stats.unique_values('分类', skip_empty=False) if stats is not None else df['分类'].unique()
+        matched = [category for category in categories if self.category_keyword in str(category)]
+        mask = missing_size & df['分类'].isin(matched)
+        if mask.any():
+            df['尺寸'] = add_categories(df['尺寸'], [self.size])
+            df.loc[mask, '尺寸'] = self.size
+        return df
+
+
+class PreferredSizeRule(FilterRule):
+    """尺寸规则：每个组合只保留一个尺寸
+
+    按 sizes 的先后顺序取组合中出现的第一个尺寸；都没有时按 tiebreak 处理：
+    max_cost 取成本最高的尺寸（相同时按尺寸顺序取第一个，成本都无法识别时取组合第一行的尺寸），
+    none 不筛选。
+    """
+
+    rule_type = 'preferred_size'
+
+    def __init__(self, sizes: List[str], tiebreak: str = 'max_cost', cost_column: str = '成本', **kwargs):
+        super().__init__(**kwargs)
+        if tiebreak not in ('max_cost', 'none'):
+            raise ValueError(f"不支持的尺寸规则 tiebreak: {tiebreak}")
+        self.sizes = list(sizes)
+        self.tiebreak = tiebreak
+        self.cost_column = cost_column
+
+    def apply(self, df: pd.DataFrame, stats: Optional[DatasetStats] = None) -> pd.DataFrame:
+        combo_ids = df[COMBO_ID_COLUMN]
+
+        # 每行尺寸在优先列表中的位置，组合内取最靠前的位置
+        size_ranks = {size: rank for rank, size in enumerate(self.sizes)}
+        ranks = df['尺寸'].astype(object).map(size_ranks).astype(float)
+        best_ranks = ranks.groupby(combo_ids).transform('min')
+        has_preferred = best_ranks.notna()
+        keep = has_preferred & (ranks == best_ranks)
+
+        others = df[~has_preferred]
+        if self.tiebreak == 'none':
+            keep[others.index] = True
+        elif not others.empty:
+            keep[others.index] = self._max_cost_rows(others)
+        return df[keep]
+
+    def _max_cost_rows(self, others: pd.DataFrame) -> pd.Series:
+        """取每个组合中成本最高的尺寸的行"""
+        others = others.assign(成本数值=pd.to_numeric(others[self.cost_column], errors='coerce'))
+        size_max_costs = others.groupby([COMBO_ID_COLUMN, '尺寸'], observed=True)['成本数值'].max().dropna()
+        max_cost_sizes = size_max_costs.groupby(level=0).idxmax()
+        chosen_sizes = pd.Series([key[1] for key in max_cost_sizes], index=max_cost_sizes.index, dtype=object)
+
+        # 成本都无法识别的组合：取第一行的尺寸，第一行尺寸为空时不筛选
+        first_sizes = others.drop_duplicates(COMBO_ID_COLUMN).set_index(COMBO_ID_COLUMN)['尺寸'].astype(object)
+        fallback_sizes = first_sizes[~first_sizes.index.isin(chosen_sizes.index)]
+        keep_all = fallback_sizes.index[fallback_sizes.map(lambda size: not size)]
+        chosen_sizes = pd.concat([chosen_sizes, fallback_sizes[fallback_sizes.map(bool)]])
+
+        others_sizes = others[COMBO_ID_COLUMN].map(chosen_sizes)
+        return (others['尺寸'].astype(object) == others_sizes) | others[COMBO_ID_COLUMN].isin(keep_all)
+
+
+class MinPriceRule(FilterRule):
+    """最低价规则：每个组合内按 group_by 分组，取价格最低的第一行（价格都无法识别时取第一行）
+
+    结果按组合首次出现的顺序排列，组合内按分组列排序。
+    """
+
+    rule_type = 'min_price'
+
+    def __init__(self, group_by: List[str], price_column: str = '价格', **kwargs):
+        super().__init__(**kwargs)
+        self.group_by = list(group_by)
+        self.price_column = price_column
+
+    def apply(self, df: pd.DataFrame, stats: Optional[DatasetStats] = None) -> pd.DataFrame:
+        group_cols = [COMBO_ID_COLUMN] + self.group_by
+        df = df.dropna(subset=self.group_by)
+        prices = pd.to_numeric(df[self.price_column], errors='coerce')
+        # 稳定排序后价格最低（相同时靠前）的行排在组内第一，价格为空的排在最后
+        by_price = df.iloc[np.argsort(prices.to_numpy(dtype=float), kind='stable')]
+        selected = by_price.drop_duplicates(subset=group_cols)
+        return selected.sort_values(group_cols, kind='stable')
+
+
+RULE_TYPES = {rule.rule_type: rule for rule in (CategoryDefaultSizeRule, PreferredSizeRule, MinPriceRule)}
+
+
+def compile_rules(rule_configs: List[Dict[str, Any]]) -> List[FilterRule]:
+    """把配置中的规则声明编译为规则对象"""
+    rules = []
+    for rule_config in rule_configs:
+        options = dict(rule_config)
+        rule_type = options.pop('type', None)
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"未知的筛选规则类型: {rule_type}")
+        rules.append(RULE_TYPES[rule_type](**options))
+    return rules
+
+
+class FilterRuleEngine:
+    """筛选规则引擎，创建时编译一次规则，之后每次筛选按顺序执行并记录各规则的耗时和删除行数
+
+    规则分两个阶段：overrides 在全部数据上修正取值（如促销款默认尺寸），
+    selection 在有配置颜色组合的行上逐步筛选。
+    """
+
+    def __init__(self, rules_config: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        rules_config = rules_config or FILTER_RULES_CONFIG
+        self.override_rules = compile_rules(rules_config.get('overrides', []))
+        self.selection_rules = compile_rules(rules_config.get('selection', []))
+        self.last_report: List[Dict[str, Any]] = []
+
+    def apply_overrides(self, df: pd.DataFrame, use_size_format: bool = False,
+                        stats: Optional[DatasetStats] = None) -> pd.DataFrame:
+        """执行取值修正规则，stats 为 df 的统计上下文"""
+        self.last_report = []
+        return self._run(self.override_rules, df, use_size_format, stats)
+
+    def apply_selection(self, df: pd.DataFrame, use_size_format: bool = False) -> pd.DataFrame:
+        """执行筛选规则，df 需包含组合序号列"""
+        return self._run(self.selection_rules, df, use_size_format)
+
+    def _run(self, rules: List[FilterRule], df: pd.DataFrame, use_size_format: bool,
+             stats: Optional[DatasetStats] = None) -> pd.DataFrame:
+        """按顺序执行规则，记录每条规则的耗时和删除的行数
+
+        统计上下文只对应输入数据，某条规则删除行后，后面的规则不再使用。
+        """
+        for rule in rules:
+            if use_size_format and rule.skip_in_size_format:
+                continue
+            rows_before = len(df)
+            start = time.perf_counter()
+            df = rule.apply(df, stats)
+            if len(df) != rows_before:
+                stats = None
+            elapsed = time.perf_counter() - start
+            removed = rows_before - len(df)
+            self.last_report.append({'rule': rule.name, 'seconds': elapsed, 'rows_before': rows_before,
+                                     'rows_removed': removed})
+            logger.info(f"筛选规则[{rule.name}]：耗时{elapsed * 1000:.1f}ms，{rows_before}行中删除{removed}行")
+        return df
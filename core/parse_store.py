@@ -0,0 +1,101 @@
+"""
+简称解析结果存储 - 把（简称, 分类）的解析结果持久化到本地 SQLite，跨次启动复用
+"""
+
+import sqlite3
+import sys
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import PARSE_STORE_CONFIG
+
+try:
+    from utils.logger import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+
+class ParseStore:
+    """解析结果存储类，按（简称, 分类, 提取规则版本）保存提取结果
+
+    首次使用时用一条查询把当前规则版本的全部记录读入内存；提取规则变化后规则版本随之变化，
+    旧版本的记录在读取时删除。存储读写失败只记录警告，不影响提取。
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, enabled: Optional[bool] = None):
+        self.db_path = Path(db_path or PARSE_STORE_CONFIG["db_path"])
+        self.enabled = PARSE_STORE_CONFIG["enabled"] if enabled is None else enabled
+        self._rules_version: Optional[str] = None
+        self._records: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+
+    def load(self, rules_version: str) -> Dict[Tuple[str, str], Tuple[str, ...]]:
+        """读取指定规则版本的全部解析结果，返回 {(简称, 分类): 各提取列取值}"""
+        if not self.enabled:
+            return {}
+        if self._rules_version == rules_version:
+            return self._records
+
+        self._rules_version = rules_version
+        self._records = {}
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM parsed_names WHERE rules_version != ?", (rules_version,))
+                rows = conn.execute(
+                    "SELECT name, category, extracted_category, config, size, speed, color "
+                    "FROM parsed_names WHERE rules_version = ?", (rules_version,)
+                ).fetchall()
+            self._records = {(row[0], row[1]): tuple(row[2:]) for row in rows}
+            logger.info(f"读取简称解析结果存储，共{len(self._records)}条")
+        except Exception as e:
+            logger.warning(f"读取简称解析结果存储失败: {e}")
+        return self._records
+
+    def save(self, rules_version: str, pairs: Sequence[Tuple[str, str]], values: Sequence[Tuple[str, ...]]):
+        """保存新解析的结果，values 依次为 提取的分类、配置、尺寸、速别、颜色"""
+        if not self.enabled or not pairs:
+            return
+
+        if self._rules_version == rules_version:
+            self._records.update(zip(pairs, values))
+        try:
+            with self._connection() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO parsed_names "
+                    "(name, category, rules_version, extracted_category, config, size, speed, color) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(name, category, rules_version, *value) for (name, category), value in zip(pairs, values)]
+                )
+        except Exception as e:
+            logger.warning(f"写入简称解析结果存储失败: {e}")
+
+    def clear(self):
+        """清空存储"""
+        self._rules_version = None
+        self._records = {}
+        try:
+            self.db_path.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"清空简称解析结果存储失败: {e}")
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """打开数据库（表不存在时创建），正常结束时提交事务，最后关闭连接"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS parsed_names ("
+                    "name TEXT NOT NULL, category TEXT NOT NULL, rules_version TEXT NOT NULL, "
+                    "extracted_category TEXT, config TEXT, size TEXT, speed TEXT, color TEXT, "
+                    "PRIMARY KEY (name, category, rules_version))"
+                )
+                yield conn
+        finally:
+            conn.close()
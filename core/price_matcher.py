@@ -3,6 +3,7 @@
 """
 
 import pandas as pd
+import numpy as np
 import re
 from typing import Dict, Tuple, Optional
 import sys
@@ -11,6 +12,12 @@ import os
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config.settings import FUZZY_MATCH_CONFIG, MATCH_REPORT_CONFIG, PROFIT_TABLE_CONFIG
+from models.data_models import MatchReport
+from utils.match_keys import canonical_text, join_key, stored_text
+from utils.ngram_index import NgramIndex
+from utils.numeric import RATE_STATUS_COLUMN, RATE_STATUS_LABELS, to_number
+
 try:
     from utils.logger import logger
     from core.data_extractor import DataExtractor
@@ -22,117 +29,41 @@ except ImportError:
 
 class PriceMatcher:
     """价格匹配器类，负责价格匹配和更新逻辑"""
+
+    # 反向改价时读取的原始数据列（速别、尺寸缺失时从简称提取）
+    required_columns = ['简称', '速别', '尺寸', '价格', '成本']
+
+    # 毛利表中的尺寸统一为26寸，原始数据简称中的这些尺寸规范化后再匹配
+    size_pattern = re.compile(r'24寸|27\.5寸')
+    normalized_size = '26寸'
+    # 匹配成功后按原始尺寸加价
+    size_surcharges = {'27.5寸': 20.0}
+    # 各级匹配的匹配方式（按优先级排列，对应 match_prices 的三级匹配键），以及匹配报告中未匹配行的匹配方式
+    match_methods = ('直接匹配', '尺寸规范化匹配', '尺寸规范化匹配(无速别)')
+    fuzzy_method = '模糊匹配'
+    unmatched_method = '未匹配'
+    empty_name_method = '简称为空'
     
-    def __init__(self):
-        self.data_extractor = DataExtractor()
+    def __init__(self, data_extractor: Optional[DataExtractor] = None):
+        # 与数据服务共用同一个提取器，简称解析缓存在两处共享
+        self.data_extractor = data_extractor or DataExtractor()
+        # 最近一次改价的匹配报告
+        self.last_report: Optional[MatchReport] = None
 
     def update_prices(self, original_data: pd.DataFrame, modified_profit_table: pd.DataFrame) -> pd.DataFrame:
         """根据更新后的毛利表更新价格"""
         try:
             updated_data = original_data.copy()
 
-            # 初始化修改后价格与未匹配标记
-            updated_data['修改后价格'] = None
-            updated_data['未匹配'] = False
-
-            # 创建价格映射（key: 简称|速别 -> (价格, 毛利表行号)）
-            price_mapping = self._create_price_mapping_with_index(modified_profit_table)
-
-            # 统计匹配情况
-            matched_count = 0
-            unmatched_count = 0
-
-            logger.info("开始价格匹配，详细日志如下：")
-            logger.info("=" * 80)
-
-            # 更新价格逻辑：
-            # 1. 直接用简称匹配
-            # 2. 匹配失败的，把尺寸改为26寸再进行匹配
-            # 3. 最后把27.5寸的再加20元
-            for index, row in updated_data.iterrows():
-                try:
-                    name = str(row.get('简称', '')).strip()
-                    if not name or name == 'nan':
-                        updated_data.at[index, '未匹配'] = True
-                        unmatched_count += 1
-                        logger.warning(f"原始数据第{index+1}行：简称为空，跳过匹配")
-                        continue
-
-                    # 速别：优先取列值，否则从简称提取
-                    speed_val = str(row.get('速别', '')).strip()
-                    if not speed_val:
-                        speed_val = self.data_extractor.extract_speed_from_name(name) or ''
-                        speed_val = str(speed_val).strip()
-
-                    # 原始尺寸：优先取列值，否则从简称提取
-                    size = str(row.get('尺寸', '')).strip()
-                    if not size:
-                        size = self.data_extractor.extract_size_from_name(name) or ''
-                        size = str(size).strip()
-
-                    base_price = None
-                    matched_key = None
-                    profit_table_row = None
-                    match_method = None
-                    
-                    # 第一步：直接用简称匹配
-                    key = f"{name}|{speed_val}" if speed_val else name
-                    if key in price_mapping:
-                        base_price, profit_table_row = price_mapping[key]
-                        matched_key = key
-                        match_method = "直接匹配"
-                    
-                    # 第二步：匹配失败的，把尺寸改为26寸再进行匹配
-                    if base_price is None:
-                        name_26 = re.sub(r'24寸|27\.5寸', '26寸', name)
-                        key_26 = f"{name_26}|{speed_val}" if speed_val else name_26
-                        if key_26 in price_mapping:
-                            base_price, profit_table_row = price_mapping[key_26]
-                            matched_key = key_26
-                            match_method = "尺寸规范化匹配"
-                        else:
-                            # 尝试不带速别的键（兜底）
-                            if name_26 in price_mapping:
-                                base_price, profit_table_row = price_mapping[name_26]
-                                matched_key = name_26
-                                match_method = "尺寸规范化匹配(无速别)"
-
-                    if base_price is not None:
-                        # 第三步：最后把27.5寸的再加20元
-                        final_price = float(base_price)
-                        if size == '27.5寸':
-                            final_price += 20.0
-                            size_adjustment = " (+20元 for 27.5寸)"
-                        else:
-                            size_adjustment = ""
-                        
-                        updated_data.at[index, '修改后价格'] = final_price
-                        updated_data.at[index, '未匹配'] = False
-                        matched_count += 1
-                        
-                        # 输出匹配成功日志
-                        logger.info(f"✓ 原始数据第{index+1}行 [{name}|{speed_val}|{size}] "
-                                  f"-> 毛利表第{profit_table_row+1}行 [{matched_key}] "
-                                  f"匹配方式: {match_method}, 价格: {base_price} -> {final_price}{size_adjustment}")
-                    else:
-                        # 未匹配
-                        updated_data.at[index, '修改后价格'] = None
-                        updated_data.at[index, '未匹配'] = True
-                        unmatched_count += 1
-                        
-                        # 输出未匹配日志
-                        logger.warning(f"✗ 原始数据第{index+1}行 [{name}|{speed_val}|{size}] 未找到匹配项")
-
-                except Exception as e:
-                    logger.error(f"处理原始数据第{index+1}行时出错: {e}")
-                    updated_data.at[index, '修改后价格'] = None
-                    updated_data.at[index, '未匹配'] = True
-                    unmatched_count += 1
-                    continue
-
-            logger.info("=" * 80)
-            logger.info(f"价格更新完成！匹配成功: {matched_count}行, 未匹配: {unmatched_count}行")
-            
+            # 整表一次匹配，得到修改后价格与未匹配标记
+            matches = self.match_prices(updated_data, modified_profit_table)
+            updated_data['修改后价格'] = matches['修改后价格']
+            updated_data['未匹配'] = matches['未匹配']
+
+            # 逐行的匹配结果保存在匹配报告中，日志只记录汇总
+            self.last_report = self.build_match_report(updated_data, matches)
+            self._log_match_report(self.last_report)
+
             # 计算新的毛利率
             updated_data = self._calculate_new_profit_rate(updated_data)
             
@@ -142,93 +73,241 @@ class PriceMatcher:
             logger.error(f"更新价格时出错: {e}")
             raise
 
+    def match_prices(self, original_data: pd.DataFrame, profit_table: pd.DataFrame) -> pd.DataFrame:
+        """为原始数据的每一行匹配毛利表价格，各匹配键整列计算后与毛利表的键索引连接
+
+        匹配优先级（前一级匹配不到时使用下一级）：
+        1. 直接匹配：简称|速别（速别为空时只用简称）
+        2. 尺寸规范化匹配：简称中的24寸、27.5寸改为26寸后的 简称|速别
+        3. 尺寸规范化匹配(无速别)：尺寸规范化后的简称
+        4. 模糊匹配（FUZZY_MATCH_CONFIG 开启时）：尺寸规范化后的 简称|速别 与毛利表匹配键的 n-gram 相似度
+           达到阈值时采用最相似的键，未达到阈值的只给出建议匹配键和相似度
+        简称、速别、尺寸按 str() 转换后去掉首尾空白（空值为"nan"），速别、尺寸为空时从简称提取；
+        简称为空或为空值的行不匹配。匹配成功的行按原始尺寸加价（27.5寸加20元）。
+
+        Returns:
+            与 original_data 行索引相同的DataFrame：简称、速别、尺寸、匹配键、匹配方式、毛利表行（行号）、
+            毛利表价格、尺寸加价、修改后价格（未匹配为NaN）、未匹配、建议匹配键、相似度
+        """
+        names = self._original_text(original_data, '简称')
+        speeds = self._original_text(original_data, '速别')
+        sizes = self._original_text(original_data, '尺寸')
+        # 速别、尺寸：优先取列值，否则从简称提取
+        speeds = speeds.where(speeds != '', self._map_names(names, self._speed_from_name))
+        sizes = sizes.where(sizes != '', self._map_names(names, self._size_from_name))
+        normalized_names = self._map_names(names, self._normalize_size)
+
+        price_index = self._price_index(profit_table)
+        keys = pd.Index(price_index['匹配键'])
+        normalized_keys = join_key(normalized_names, speeds)
+        tiers = zip(self.match_methods, [join_key(names, speeds), normalized_keys, normalized_names])
+
+        # 简称为空（包括空值）的行不匹配
+        has_name = (~names.isin(['', 'nan'])).to_numpy()
+        positions = np.full(len(names), -1, dtype=np.int64)
+        methods = np.full(len(names), None, dtype=object)
+        matched_keys = np.full(len(names), None, dtype=object)
+        for method, tier_keys in tiers:
+            pending = np.flatnonzero((positions < 0) & has_name)
+            if not len(pending):
+                break
+            found = keys.get_indexer(tier_keys.to_numpy(dtype=object)[pending])
+            hit = pending[found >= 0]
+            positions[hit] = found[found >= 0]
+            methods[hit] = method
+            matched_keys[hit] = tier_keys.to_numpy(dtype=object)[hit]
+
+        # 模糊匹配（可选）：仍未匹配的行用尺寸规范化后的匹配键查找最相似的键，相似度达到阈值时采用
+        suggested_keys = np.full(len(names), None, dtype=object)
+        scores = np.full(len(names), np.nan)
+        pending = np.flatnonzero((positions < 0) & has_name)
+        if FUZZY_MATCH_CONFIG["enabled"] and len(pending) and len(keys):
+            found, pending_scores = self._fuzzy_search(keys, normalized_keys.to_numpy(dtype=object)[pending])
+            has_suggestion = found >= 0
+            suggested_keys[pending[has_suggestion]] = keys.to_numpy(dtype=object)[found[has_suggestion]]
+            scores[pending[has_suggestion]] = pending_scores[has_suggestion]
+            accepted = has_suggestion & (pending_scores >= FUZZY_MATCH_CONFIG["min_score"])
+            positions[pending[accepted]] = found[accepted]
+            methods[pending[accepted]] = self.fuzzy_method
+            matched_keys[pending[accepted]] = suggested_keys[pending[accepted]]
+
+        matched = positions >= 0
+        base_prices = np.full(len(names), np.nan)
+        base_prices[matched] = price_index['价格'].to_numpy()[positions[matched]]
+        profit_rows = np.full(len(names), -1, dtype=object)
+        profit_rows[matched] = price_index['毛利表行'].to_numpy()[positions[matched]]
+        adjustments = np.where(matched, sizes.map(self.size_surcharges).fillna(0.0).to_numpy(dtype=float), 0.0)
+
+        return pd.DataFrame({
+            '简称': names.to_numpy(dtype=object),
+            '速别': speeds.to_numpy(dtype=object),
+            '尺寸': sizes.to_numpy(dtype=object),
+            '匹配键': matched_keys,
+            '匹配方式': methods,
+            '毛利表行': profit_rows,
+            '毛利表价格': base_prices,
+            '尺寸加价': adjustments,
+            '修改后价格': base_prices + adjustments,
+            '未匹配': ~matched,
+            '建议匹配键': suggested_keys,
+            '相似度': scores
+        }, index=original_data.index)
+
+    def _fuzzy_search(self, keys: pd.Index, queries: np.ndarray):
+        """在毛利表匹配键的 n-gram 索引中查找每个查询最相似的键，返回（键的序号（没有时为-1）, 相似度）
+
+        相同的查询只查找一次。
+        """
+        index = NgramIndex(keys.to_numpy(dtype=object), n=FUZZY_MATCH_CONFIG["ngram"],
+                           max_candidates=FUZZY_MATCH_CONFIG["max_candidates"],
+                           common_ratio=FUZZY_MATCH_CONFIG["common_ratio"])
+        codes, unique_queries = pd.factorize(queries)
+        results = [index.search(query) for query in unique_queries]
+        found = np.array([result[0] for result in results], dtype=np.int64)[codes]
+        scores = np.array([result[1] for result in results], dtype=float)[codes]
+        logger.info(f"模糊匹配：{len(unique_queries)}个未匹配的键，候选键{len(keys)}个")
+        return found, scores
+
+    def build_match_report(self, original_data: pd.DataFrame, matches: pd.DataFrame) -> MatchReport:
+        """由 match_prices 的结果生成匹配报告：每行的行号、匹配键、匹配方式、毛利表行号和价格变化"""
+        has_name = ~matches['简称'].isin(['', 'nan'])
+        methods = matches['匹配方式'].where(~matches['未匹配'],
+                                            np.where(has_name, self.unmatched_method, self.empty_name_method))
+        original_prices = to_number(original_data['价格']) if '价格' in original_data.columns \
+            else pd.Series(np.nan, index=original_data.index)
+        rows = pd.DataFrame({
+            '行号': np.arange(1, len(matches) + 1),
+            '简称': matches['简称'],
+            '速别': matches['速别'],
+            '尺寸': matches['尺寸'],
+            '匹配方式': methods,
+            '匹配键': matches['匹配键'],
+            '毛利表行号': (pd.to_numeric(matches['毛利表行'].where(~matches['未匹配']), errors='coerce') + 1).astype('Int64'),
+            '原价格': original_prices.to_numpy(dtype=float),
+            '修改后价格': matches['修改后价格'],
+            '价格变化': matches['修改后价格'] - original_prices.to_numpy(dtype=float),
+            '建议匹配键': matches['建议匹配键'],
+            '相似度': matches['相似度']
+        }).reset_index(drop=True)
+
+        counts = methods.value_counts()
+        method_order = list(self.match_methods) + [self.fuzzy_method, self.unmatched_method, self.empty_name_method]
+        return MatchReport(
+            rows=rows,
+            counts={method: int(counts.get(method, 0)) for method in method_order},
+            unmatched_methods=[self.unmatched_method, self.empty_name_method]
+        )
+
+    def _log_match_report(self, report: MatchReport):
+        """记录匹配汇总，以及配置条数以内的未匹配行"""
+        logger.info(f"价格更新完成！匹配成功: {report.matched_count}行, 未匹配: {report.unmatched_count}行")
+        logger.info("各匹配方式行数：" + "，".join(f"{method} {count}" for method, count in report.counts.items()))
+
+        sample_size = MATCH_REPORT_CONFIG["unmatched_log_sample"]
+        unmatched = report.rows[report.rows['匹配方式'].isin(report.unmatched_methods)]
+        for row in unmatched.head(sample_size).itertuples(index=False):
+            suggestion = f"（最相似: {row.建议匹配键}，相似度{row.相似度:.2f}）" if row.建议匹配键 is not None else ""
+            logger.warning(f"✗ 原始数据第{row.行号}行 [{row.简称}|{row.速别}|{row.尺寸}] {row.匹配方式}{suggestion}")
+        if len(unmatched) > sample_size:
+            logger.warning(f"另有{len(unmatched) - sample_size}行未匹配，详见匹配报告")
+
     def _create_price_mapping(self, profit_table: pd.DataFrame) -> Dict[str, float]:
         """创建价格映射：key = 简称|速别 -> 26寸价格（毛利表默认26寸）"""
-        price_mapping: Dict[str, float] = {}
-        for _, row in profit_table.iterrows():
-            name = str(row.get('简称', '')).strip()
-            speed = str(row.get('速别', '')).strip()
-            price = row.get('价格', '')
-            if name and pd.notna(price) and str(price).strip():
-                try:
-                    price_val = float(str(price).replace(',', ''))
-                    key = f"{name}|{speed}" if speed else name
-                    price_mapping[key] = price_val
-                except:
-                    continue
-        return price_mapping
+        price_index = self._price_index(profit_table)
+        return dict(zip(price_index['匹配键'], price_index['价格']))
 
     def _create_price_mapping_with_index(self, profit_table: pd.DataFrame) -> Dict[str, Tuple[float, int]]:
         """创建价格映射（包含行号）：key = 简称|速别 -> (价格, 毛利表行号)"""
-        price_mapping: Dict[str, Tuple[float, int]] = {}
-        for index, row in profit_table.iterrows():
-            name = str(row.get('简称', '')).strip()
-            speed = str(row.get('速别', '')).strip()
-            price = row.get('价格', '')
-            if name and pd.notna(price) and str(price).strip():
-                try:
-                    price_val = float(str(price).replace(',', ''))
-                    key = f"{name}|{speed}" if speed else name
-                    price_mapping[key] = (price_val, index)
-                except:
-                    continue
-        return price_mapping
+        price_index = self._price_index(profit_table)
+        return dict(zip(price_index['匹配键'], zip(price_index['价格'], price_index['毛利表行'])))
+
+    def _price_index(self, profit_table: pd.DataFrame) -> pd.DataFrame:
+        """毛利表的匹配键索引：每个键（简称|速别，速别为空时为简称）一行，包含价格和毛利表行号
+
+        简称为空或价格无法识别的行不参与匹配；相同的键以毛利表中靠后的行为准。
+        """
+        # 有隐藏的匹配文本列时（导出后重新导入的毛利表），未修改的行直接使用
+        names = stored_text(profit_table, '简称')
+        # 价格列整列转换为数值（导入的毛利表可能被编辑为文本）
+        prices = self._profit_table_prices(profit_table)
+        valid = ((names != '') & prices.notna()).to_numpy()
+        price_index = pd.DataFrame({
+            '匹配键': join_key(names, stored_text(profit_table, '速别')).to_numpy(dtype=object)[valid],
+            '价格': prices.to_numpy(dtype=float)[valid],
+            '毛利表行': np.asarray(profit_table.index)[valid]
+        })
+        return price_index.drop_duplicates('匹配键', keep='last').reset_index(drop=True)
+
+    def _original_text(self, data: pd.DataFrame, col: str) -> pd.Series:
+        """原始数据列的匹配文本，缺少该列时为空字符串"""
+        if col not in data.columns:
+            return pd.Series('', index=data.index, dtype=object)
+        return canonical_text(data[col])
+
+    def _map_names(self, names: pd.Series, func) -> pd.Series:
+        """对每个不同的简称调用一次 func"""
+        codes, uniques = pd.factorize(names)
+        results = np.array([func(name) for name in uniques] + [''], dtype=object)
+        return pd.Series(results[codes], index=names.index, dtype=object)
+
+    def _normalize_size(self, name: str) -> str:
+        """简称中的尺寸规范化为毛利表使用的尺寸（24寸、27.5寸改为26寸）"""
+        return self.size_pattern.sub(self.normalized_size, name)
+
+    def _speed_from_name(self, name: str) -> str:
+        return str(self.data_extractor.extract_speed_from_name(name) or '').strip() if name else ''
+
+    def _size_from_name(self, name: str) -> str:
+        return str(self.data_extractor.extract_size_from_name(name) or '').strip() if name else ''
+
+    def _raw_column(self, data: pd.DataFrame, col: str) -> pd.Series:
+        """读取一列的原始取值，缺少该列时全部为空值"""
+        if col not in data.columns:
+            return pd.Series(np.nan, index=data.index)
+        return data[col]
+
+    def _profit_table_prices(self, profit_table: pd.DataFrame) -> pd.Series:
+        """毛利表价格列转换为浮点数，缺少价格列时全部为NaN"""
+        if '价格' not in profit_table.columns:
+            return pd.Series(float('nan'), index=profit_table.index)
+        return to_number(profit_table['价格'])
 
     def _calculate_new_profit_rate(self, data: pd.DataFrame) -> pd.DataFrame:
-        """计算基于新价格的毛利率"""
+        """计算基于新价格的毛利率（小数），整列计算
+
+        售价为修改后价格，没有修改后价格时使用原价格；毛利率 = (售价 - 成本 - 快递费) / 售价，售价不大于0时为0。
+        售价或成本为空的行状态为"无法计算"，不是数值的行状态为"计算错误"，这些行的新毛利率为NaN。
+        """
         try:
-            # 添加新毛利率列
-            data['新毛利率'] = None
-            
-            # 快递费固定为30元
-            express_fee = 30.0
-            
-            for index, row in data.iterrows():
-                try:
-                    new_price = row.get('修改后价格')
-                    cost = row.get('成本')
-                    
-                    # 如果有新价格且有成本，计算新毛利率
-                    if pd.notna(new_price) and pd.notna(cost) and new_price is not None:
-                        try:
-                            new_price_val = float(new_price)
-                            cost_val = float(cost)
-                            
-                            if new_price_val > 0:
-                                # 毛利率 = (售价 - 成本 - 快递费) / 售价 * 100%
-                                profit_rate = ((new_price_val - cost_val - express_fee) / new_price_val) * 100
-                                data.at[index, '新毛利率'] = f"{profit_rate:.2f}%"
-                            else:
-                                data.at[index, '新毛利率'] = "0.00%"
-                        except (ValueError, TypeError):
-                            data.at[index, '新毛利率'] = "计算错误"
-                    else:
-                        # 没有新价格时，使用原价格计算（如果存在）
-                        original_price = row.get('价格')
-                        if pd.notna(original_price) and pd.notna(cost):
-                            try:
-                                original_price_val = float(original_price)
-                                cost_val = float(cost)
-                                
-                                if original_price_val > 0:
-                                    # 毛利率 = (售价 - 成本 - 快递费) / 售价 * 100%
-                                    profit_rate = ((original_price_val - cost_val - express_fee) / original_price_val) * 100
-                                    data.at[index, '新毛利率'] = f"{profit_rate:.2f}%"
-                                else:
-                                    data.at[index, '新毛利率'] = "0.00%"
-                            except (ValueError, TypeError):
-                                data.at[index, '新毛利率'] = "计算错误"
-                        else:
-                            data.at[index, '新毛利率'] = "无法计算"
-                            
-                except Exception as e:
-                    logger.warning(f"计算第{index+1}行毛利率时出错: {e}")
-                    data.at[index, '新毛利率'] = "计算错误"
-                    continue
-            
-            logger.info("新毛利率计算完成（已包含快递费30元）")
+            # 每单快递费（配置项）
+            express_fee = PROFIT_TABLE_CONFIG['express_fee']
+
+            new_prices = self._raw_column(data, '修改后价格')
+            original_prices = self._raw_column(data, '价格')
+            costs = self._raw_column(data, '成本')
+
+            has_new_price = new_prices.notna().to_numpy()
+            price_values = np.where(has_new_price, to_number(new_prices).to_numpy(dtype=float),
+                                    to_number(original_prices).to_numpy(dtype=float))
+            cost_values = to_number(costs).to_numpy(dtype=float)
+
+            missing = ~(has_new_price | original_prices.notna().to_numpy()) | costs.isna().to_numpy()
+            invalid = ~missing & (np.isnan(price_values) | np.isnan(cost_values))
+            status = np.zeros(len(data), dtype=np.int8)
+            status[missing] = 1
+            status[invalid] = 2
+
+            rates = np.full(len(data), np.nan)
+            np.divide(price_values - cost_values - express_fee, price_values, out=rates, where=price_values > 0)
+            rates[price_values <= 0] = 0.0
+            rates[status != 0] = np.nan
+
+            data['新毛利率'] = rates
+            data[RATE_STATUS_COLUMN] = status
+
+            logger.info(f"新毛利率计算完成（已包含快递费{express_fee:g}元）："
+                        + "，".join(f"{label}{int((status == code).sum())}行" for code, label in RATE_STATUS_LABELS.items()))
             return data
-            
         except Exception as e:
             logger.error(f"计算新毛利率时出错: {e}")
             return data
\ No newline at end of file
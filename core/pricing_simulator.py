@@ -0,0 +1,105 @@
+"""
+改价模拟器 - 对毛利表中的每个产品批量计算多个改价方案下的毛利润和毛利率
+"""
+
+import pandas as pd
+import numpy as np
+import re
+from typing import Iterable, Optional, Tuple, Union
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import PROFIT_TABLE_CONFIG
+from utils.numeric import to_number
+
+try:
+    from utils.logger import logger
+    from models.data_models import PriceSimulationResult
+except ImportError as e:
+    import logging
+    logger = logging.getLogger(__name__)
+    raise ImportError(f"导入模块失败: {e}")
+
+
+# 改价方案：'+3%'、'-5%' 按比例改价，'+20'、'+20元'、数值按固定金额改价，(比例, 金额) 同时改价
+Scenario = Union[str, float, Tuple[float, float]]
+
+_SCENARIO_PATTERN = re.compile(r'^([+-]?\d+(?:\.\d+)?)\s*(%|元)?$')
+
+
+def parse_scenario(scenario: Scenario) -> Tuple[float, float, str]:
+    """解析改价方案，返回（改价比例, 改价金额, 方案名称），新价格 = 价格 × (1 + 比例) + 金额"""
+    if isinstance(scenario, tuple):
+        ratio, offset = float(scenario[0]), float(scenario[1])
+        return ratio, offset, f"{ratio * 100:+g}%{offset:+g}元"
+    if isinstance(scenario, (int, float, np.number)):
+        return 0.0, float(scenario), f"{float(scenario):+g}元"
+
+    text = str(scenario).strip()
+    match = _SCENARIO_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"无法识别的改价方案: {scenario}")
+    value = float(match.group(1))
+    if match.group(2) == '%':
+        return value / 100, 0.0, f"{value:+g}%"
+    return 0.0, value, f"{value:+g}元"
+
+
+class PricingSimulator:
+    """改价模拟器
+
+    所有方案和产品一次计算：方案的改价比例、金额为列向量，产品的价格、成本、快递为行向量，
+    通过 NumPy 广播得到 方案 × 产品 的毛利润和毛利率矩阵，不需要逐个方案修改毛利表再重新计算。
+    毛利润 = 新价格 - 成本 - 快递，毛利率 = 毛利润 / 新价格（新价格不大于0时为0），与改价后新毛利率的口径一致。
+    """
+
+    def __init__(self, express_fee: Optional[float] = None):
+        # 毛利表没有快递列时使用的每单快递费
+        self.express_fee = PROFIT_TABLE_CONFIG['express_fee'] if express_fee is None else express_fee
+
+    def simulate(self, profit_table: pd.DataFrame, scenarios: Iterable[Scenario]) -> PriceSimulationResult:
+        """计算毛利表每一行在各改价方案下的毛利润和毛利率
+
+        Args:
+            profit_table: 毛利表（需要价格、成本列，有快递列时按行使用，否则使用配置的快递费）
+            scenarios: 改价方案，如 ['+3%', '+5%', '+20元']
+        """
+        try:
+            parsed = [parse_scenario(scenario) for scenario in scenarios]
+            ratios = np.array([item[0] for item in parsed], dtype=float)
+            offsets = np.array([item[1] for item in parsed], dtype=float)
+
+            prices = self._column(profit_table, '价格', np.nan)
+            # 每个产品不随方案变化的支出：成本 + 快递
+            express = self._column(profit_table, '快递', self.express_fee)
+            expenses = self._column(profit_table, '成本', np.nan) + np.where(np.isnan(express), self.express_fee, express)
+
+            new_prices = prices[np.newaxis, :] * (1.0 + ratios[:, np.newaxis]) + offsets[:, np.newaxis]
+            profits = new_prices - expenses[np.newaxis, :]
+            rates = np.full(new_prices.shape, np.nan)
+            np.divide(profits, new_prices, out=rates, where=new_prices > 0)
+            rates[new_prices <= 0] = 0.0
+
+            logger.info(f"改价模拟完成：{len(parsed)}个方案 × {len(prices)}个产品")
+            return PriceSimulationResult(
+                scenarios=[item[2] for item in parsed],
+                products=profit_table.index,
+                ratios=ratios,
+                offsets=offsets,
+                prices=prices,
+                profits=profits,
+                rates=rates
+            )
+
+        except Exception as e:
+            logger.error(f"改价模拟失败: {e}")
+            raise
+
+    def _column(self, profit_table: pd.DataFrame, col: str, default: float) -> np.ndarray:
+        """金额列转换为浮点数组，缺少该列时全部为默认值"""
+        if col not in profit_table.columns:
+            return np.full(len(profit_table), default, dtype=float)
+        return to_number(profit_table[col]).to_numpy(dtype=float)
@@ -3,87 +3,52 @@
 """
 
 import pandas as pd
-from typing import List, Dict, Any
+import numpy as np
+from typing import Optional, Tuple
 import sys
 import os
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config.settings import PROFIT_TABLE_CONFIG
+
 try:
     from utils.logger import logger
     from models.data_models import ProfitTableRow
     from core.table_format_analyzer import TableFormatAnalyzer
+    from core.data_extractor import speed_to_code
+    from core.dataset_stats import DatasetStats
 except ImportError:
     import logging
     logger = logging.getLogger(__name__)
 
+from utils.categorical import combine_columns, map_pairs
+from utils.match_keys import MATCH_KEY_COLUMNS, canonical_text
+from utils.numeric import to_number, to_rate
+
 
 class ProfitCalculator:
     """毛利计算器类，负责毛利表生成和相关计算"""
+
+    # 生成毛利表时读取的原始数据列
+    required_columns = ['简称', '价格', '成本', '毛利', '毛利率']
     
     def __init__(self):
         self.format_analyzer = TableFormatAnalyzer()
 
-    def generate_profit_table(self, df: pd.DataFrame) -> pd.DataFrame:
-        """生成毛利表"""
+    def generate_profit_table(self, df: pd.DataFrame, stats: Optional[DatasetStats] = None) -> pd.DataFrame:
+        """生成毛利表，stats 为 df 的统计上下文（为None时新建）"""
         try:
             # 分析数据特征，决定使用哪种格式
-            analysis = self.format_analyzer.analyze_data_characteristics(df)
+            analysis = self.format_analyzer.analyze_data_characteristics(df, stats)
             use_size_format = analysis['should_use_size_format']
             
             logger.info(f"数据分析结果: 尺寸项{analysis['size_count']}个，速别项{analysis['speed_count']}个")
             logger.info(f"使用格式: {'尺寸格式' if use_size_format else '速别格式'}")
             
-            # 创建毛利表数据
-            profit_data = []
-            
-            # 首先处理缺少尺寸信息的产品，显示在最上方
-            if '简称' in df.columns:
-                no_size_mask = ~df['简称'].str.contains('寸', na=False)
-                no_size_data = df[no_size_mask]
-                if not no_size_data.empty:
-                    for _, row in no_size_data.iterrows():
-                        config_name = str(row.get('简称', '缺少尺寸信息')) if pd.notna(row.get('简称')) else '缺少尺寸信息'
-                        self._add_profit_row(profit_data, row, config_name, use_size_format)
-
-            # 处理不适用筛选逻辑的数据（配置为空的数据）
-            if '配置' in df.columns:
-                no_config_mask = df['配置'].isna() | (df['配置'] == '')
-                no_config_data = df[no_config_mask]
-                # 排除已经处理过的缺少尺寸信息的产品
-                if '简称' in no_config_data.columns:
-                    has_size_mask = no_config_data['简称'].str.contains('寸', na=False)
-                    no_config_data = no_config_data[has_size_mask]
-                if not no_config_data.empty:
-                    for _, row in no_config_data.iterrows():
-                        config_name = str(row.get('简称', '未知配置')) if pd.notna(row.get('简称')) else '未知配置'
-                        self._add_profit_row(profit_data, row, config_name, use_size_format)
-
-            # 处理有配置的数据
-            if '配置' in df.columns:
-                has_config_mask = df['配置'].notna() & (df['配置'] != '')
-                has_config_data = df[has_config_mask]
-                # 排除已经处理过的缺少尺寸信息的产品
-                if '简称' in has_config_data.columns:
-                    has_size_mask = has_config_data['简称'].str.contains('寸', na=False)
-                    has_config_data = has_config_data[has_size_mask]
-                if not has_config_data.empty:
-                    self._process_config_data(profit_data, has_config_data, use_size_format)
-
-            # 转换为DataFrame
-            profit_df = pd.DataFrame(profit_data)
-            if not profit_df.empty:
-                # 确保缺少尺寸信息的数据显示在最上方
-                if '配置' in profit_df.columns:
-                    no_size_rows = profit_df[profit_df['配置'].str.contains('缺少尺寸信息', na=False)]
-                    no_config_rows = profit_df[profit_df['配置'].str.contains('未知配置', na=False)]
-                    has_config_rows = profit_df[~profit_df['配置'].str.contains('未知配置|缺少尺寸信息', na=False)]
-                    
-                    if not has_config_rows.empty:
-                        has_config_rows = self._sort_profit_table(has_config_rows)
-                    
-                    profit_df = pd.concat([no_size_rows, no_config_rows, has_config_rows], ignore_index=True)
+            profit_df = self.build_profit_rows(df, use_size_format)[0]
+            profit_df = self.arrange_profit_table(profit_df)
 
             logger.info(f"毛利表生成完成，共{len(profit_df)}行")
             return profit_df
@@ -92,202 +57,279 @@ class ProfitCalculator:
             logger.error(f"生成毛利表失败: {e}")
             raise
 
-    def _process_config_data(self, profit_data: List[Dict], has_config_data: pd.DataFrame, use_size_format: bool):
-        """处理有配置的数据"""
-        # 创建配置+颜色的组合键
-        has_config_data = has_config_data.copy()
-        has_config_data['配置颜色组合'] = has_config_data['配置'].fillna('') + has_config_data['颜色'].fillna('')
-        config_color_combos = has_config_data['配置颜色组合'].unique()
+    def build_profit_rows(self, df: pd.DataFrame, use_size_format: bool):
+        """按构建顺序生成毛利表各行（尚未排序）
 
-        for combo in config_color_combos:
-            if pd.isna(combo) or combo == '':
-                continue
+        各行按以下顺序排列：缺少尺寸信息的产品、配置为空的产品、有配置的产品（每个组合、尺寸/速别取第一行）。
 
-            combo_data = has_config_data[has_config_data['配置颜色组合'] == combo]
-            
-            if use_size_format:
-                # 使用尺寸格式：按尺寸和速别分组，确保不同速别的数据都被包含
-                if '尺寸' in combo_data.columns and '速别' in combo_data.columns:
-                    # 按尺寸和速别的组合分组
-                    size_speed_combos = combo_data[['尺寸', '速别']].drop_duplicates()
-                    
-                    for _, row in size_speed_combos.iterrows():
-                        size = row['尺寸']
-                        speed = row['速别']
-                        
-                        if pd.isna(size) or size == '' or pd.isna(speed) or speed == '':
-                            continue
-                        
-                        # 找到匹配的数据
-                        matching_data = combo_data[
-                            (combo_data['尺寸'] == size) & (combo_data['速别'] == speed)
-                        ]
-                        
-                        if not matching_data.empty:
-                            selected_row = matching_data.iloc[0]
-                            # 配置名称包含速别信息
-                            config_with_speed = self.format_analyzer.format_config_name_with_speed(str(combo), str(speed))
-                            self._add_profit_row(profit_data, selected_row, config_with_speed, use_size_format)
-                else:
-                    # 如果缺少必要列，按原逻辑处理
-                    sizes = combo_data['尺寸'].unique() if '尺寸' in combo_data.columns else ['未知尺寸']
-                    for size in sizes:
-                        if pd.isna(size) or size == '':
-                            continue
-                        size_data = combo_data[combo_data['尺寸'] == size]
-                        if not size_data.empty:
-                            selected_row = size_data.iloc[0]
-                            speed = selected_row.get('速别', '')
-                            config_with_speed = self.format_analyzer.format_config_name_with_speed(str(combo), str(speed))
-                            self._add_profit_row(profit_data, selected_row, config_with_speed, use_size_format)
-            else:
-                # 使用速别格式：按速别分组
-                if '速别' in combo_data.columns:
-                    speeds = combo_data['速别'].unique()
-                else:
-                    speeds = ['未知速别']
-
-                for speed in speeds:
-                    if pd.isna(speed) or speed == '':
-                        continue
-
-                    speed_data = combo_data[combo_data['速别'] == speed]
-                    if not speed_data.empty:
-                        selected_row = speed_data.iloc[0]
-                        # 配置名称直接用配置+颜色拼接
-                        config_with_color = str(combo)
-                        self._add_profit_row(profit_data, selected_row, config_with_color, use_size_format)
-
-    def _add_profit_row(self, profit_data: List[Dict], row: pd.Series, config: str, use_size_format: bool = False):
-        """添加毛利表行数据"""
-        price = row.get('价格', '')
-        cost = row.get('成本', '')
-        profit = row.get('毛利', '')
-        profit_rate = row.get('毛利率', '')
-        name = row.get('简称', '')
-        color = row.get('颜色', '')
-
-        # 格式化价格
-        price = self._format_price(price)
-        cost = self._format_price(cost)
-        profit = self._format_profit(profit, price, cost)
-        profit_rate = self._format_profit_rate(profit_rate, profit, price)
-
-        # 配置列包含颜色信息 - 特殊处理渐变色
-        config_with_color = config
-        if not use_size_format and color and str(color).strip() != '':
-            # 对于渐变色产品，保持配置名称不变，颜色信息单独处理
-            if '渐变' in str(color):
-                config_with_color = config
-            else:
-                config_with_color = f"{config}{color}"
-        
-        # 根据格式类型构建不同的行数据
-        if use_size_format:
-            # 尺寸格式：速别列替换为尺寸列
-            profit_data.append({
-                '配置': config_with_color,
-                '尺寸': row.get('尺寸', ''),
-                '简称': name if pd.notna(name) else '',
-                '价格': price,
-                '成本': cost,
-                '快递': '30.00',
-                '毛利润': profit,
-                '毛利率': profit_rate
-            })
+        Returns:
+            (毛利表行, 每行对应的 df 行号, 每行所属的部分：0缺少尺寸信息 1配置为空 2有配置)
+        """
+        positions, configs, sections = self._select_profit_rows(df, use_size_format)
+        profit_df = self._build_profit_frame(df, positions, configs, use_size_format)
+        if not profit_df.empty:
+            profit_df = self._calculate_margins(profit_df)
+        return profit_df, positions, sections
+
+    def arrange_profit_table(self, profit_df: pd.DataFrame, row_keys: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """排列毛利表：缺少尺寸信息、未知配置的行排在最上方，其余行排序
+
+        row_keys 为 profit_row_keys 的结果（与 profit_df 逐行对应），增量更新时只对新增的行计算。
+        """
+        if profit_df.empty or '配置' not in profit_df.columns:
+            return profit_df
+
+        if row_keys is None:
+            row_keys = self.profit_row_keys(profit_df)
+        parts = row_keys['部分'].to_numpy()
+        # 确保缺少尺寸信息的数据显示在最上方，其次是未知配置，两者保持构建顺序
+        has_config_positions = np.flatnonzero(parts == 2)
+        order = np.concatenate([
+            np.flatnonzero(parts == 0),
+            np.flatnonzero(parts == 1),
+            has_config_positions[self._sort_order(profit_df.iloc[has_config_positions],
+                                                  row_keys.iloc[has_config_positions])]
+        ])
+        return profit_df.iloc[order].reset_index(drop=True)
+
+    def profit_row_keys(self, profit_df: pd.DataFrame) -> pd.DataFrame:
+        """毛利表中只与行本身有关的排列键
+
+        部分：0 缺少尺寸信息，1 未知配置，2 有配置；有速别列时另有速别编码，否则有尺寸列时另有尺寸数值。
+        """
+        configs = profit_df['配置']
+        no_size = configs.str.contains('缺少尺寸信息', na=False).to_numpy(dtype=bool)
+        no_config = configs.str.contains('未知配置', na=False).to_numpy(dtype=bool)
+        keys = pd.DataFrame({'部分': np.where(no_size, 0, np.where(no_config, 1, 2)).astype(np.int8)})
+        if '速别' in profit_df.columns:
+            keys['速别编码'] = speed_sort_key(profit_df['速别'])
+        elif '尺寸' in profit_df.columns:
+            keys['尺寸数值'] = size_sort_key(profit_df['尺寸'])
+        return keys
+
+    def _select_profit_rows(self, df: pd.DataFrame, use_size_format: bool):
+        """选出毛利表各行的原始数据行号、配置名称（未拼接颜色）和所属部分"""
+        if '简称' in df.columns:
+            has_size = df['简称'].str.contains('寸', na=False).to_numpy(dtype=bool)
+            # 空值保留为NaN（由各部分填入占位名称），其余转换为字符串
+            names = df['简称'].astype(object)
+            names = names.where(names.isna(), names.astype(str))
         else:
-            # 默认速别格式
-            profit_data.append({
-                '配置': config_with_color,
-                '速别': row.get('速别', ''),
-                '简称': name if pd.notna(name) else '',
-                '价格': price,
-                '成本': cost,
-                '快递': '30.00',
-                '毛利润': profit,
-                '毛利率': profit_rate
-            })
-
-    def _format_price(self, value) -> str:
-        """格式化价格"""
-        if pd.notna(value) and value != '':
-            try:
-                return f"{float(value):.2f}"
-            except:
-                return str(value)
-        return '0.00'
-
-    def _format_profit(self, profit, price, cost) -> str:
-        """格式化毛利润"""
-        if pd.isna(profit) or profit == '':
-            try:
-                profit_val = float(price) - float(cost) if price != '' and cost != '' else 0
-                return f"{profit_val:.2f}"
-            except:
-                return '0.00'
-        return profit
-
-    def _format_profit_rate(self, profit_rate, profit, price) -> str:
-        """格式化毛利率"""
-        if pd.isna(profit_rate) or profit_rate == '':
-            try:
-                if float(price) > 0:
-                    profit_rate_val = (float(profit) / float(price)) * 100
-                    return f"{profit_rate_val:.2f}%"
-                else:
-                    return '0.00%'
-            except:
-                return '0.00%'
+            has_size = np.ones(len(df), dtype=bool)
+            names = pd.Series(np.nan, index=df.index, dtype=object)
+
+        segments = []
+        # 缺少尺寸信息的产品，显示在最上方
+        if '简称' in df.columns:
+            no_size_positions = np.flatnonzero(~has_size)
+            segments.append((0, no_size_positions, names.iloc[no_size_positions].fillna('缺少尺寸信息').to_numpy(dtype=object)))
+
+        if '配置' in df.columns:
+            has_config = (df['配置'].notna() & (df['配置'] != '')).to_numpy(dtype=bool)
+            # 不适用筛选逻辑的数据（配置为空的数据），排除已经处理过的缺少尺寸信息的产品
+            no_config_positions = np.flatnonzero(~has_config & has_size)
+            segments.append((1, no_config_positions, names.iloc[no_config_positions].fillna('未知配置').to_numpy(dtype=object)))
+            # 有配置的数据
+            config_positions = np.flatnonzero(has_config & has_size)
+            if len(config_positions):
+                segments.append((2, *self._select_config_rows(df.iloc[config_positions], config_positions, use_size_format)))
+
+        if not segments:
+            return np.array([], dtype=np.int64), np.array([], dtype=object), np.array([], dtype=np.int8)
+        positions = np.concatenate([segment[1] for segment in segments]).astype(np.int64)
+        configs = np.concatenate([segment[2] for segment in segments])
+        sections = np.concatenate([np.full(len(segment[1]), segment[0], dtype=np.int8) for segment in segments])
+        return positions, configs, sections
+
+    def _select_config_rows(self, config_data: pd.DataFrame, positions: np.ndarray, use_size_format: bool):
+        """有配置的数据：每个配置颜色组合内，每个尺寸+速别（尺寸格式）或速别（速别格式）取第一行
+
+        结果按组合首次出现的顺序排列，组合内按尺寸+速别/速别首次出现的顺序排列。
+        尺寸格式下配置名称拼接速别。
+        """
+        color = config_data['颜色'] if '颜色' in config_data.columns else pd.Series('', index=config_data.index)
+        combo_codes = pd.factorize(combine_columns(config_data['配置'], color))[0]
+        candidates = pd.DataFrame({'组合': combo_codes}, index=pd.RangeIndex(len(config_data)))
+
+        if use_size_format:
+            key_columns = ['尺寸', '速别'] if '速别' in config_data.columns else ['尺寸']
         else:
-            try:
-                rate_val = float(profit_rate)
-                if rate_val > 1:
-                    return f"{rate_val:.2f}%"
-                else:
-                    return f"{rate_val * 100:.2f}%"
-            except:
-                return str(profit_rate)
+            key_columns = ['速别']
+        valid = np.ones(len(config_data), dtype=bool)
+        for col in key_columns:
+            values = config_data[col] if col in config_data.columns else pd.Series(np.nan, index=config_data.index)
+            valid &= (values.notna() & (values != '')).to_numpy(dtype=bool)
+            candidates[col] = values.to_numpy()
+
+        # 组合内每个键取第一行，再按组合首次出现的顺序稳定排序
+        first_rows = candidates[valid].drop_duplicates(['组合'] + key_columns)
+        first_rows = first_rows.iloc[np.argsort(first_rows['组合'].to_numpy(), kind='stable')]
+        selected = config_data.iloc[first_rows.index]
+
+        selected_color = selected['颜色'] if '颜色' in selected.columns else pd.Series('', index=selected.index)
+        configs = map_pairs(selected['配置'], selected_color, self._config_display_name)
+        if use_size_format:
+            # 配置名称包含速别信息
+            speeds = selected['速别'] if '速别' in selected.columns else pd.Series('', index=selected.index)
+            configs = map_pairs(pd.Series(configs, index=selected.index), speeds,
+                                lambda config, speed: self.format_analyzer.format_config_name_with_speed(config, str(speed)))
+        return positions[first_rows.index.to_numpy()], configs
+
+    def _config_display_name(self, config, color) -> str:
+        """配置+颜色的显示名称，颜色通常已包含在配置文字中，此时不重复拼接"""
+        config = str(config)
+        color = str(color)
+        if not color or color in config:
+            return config
+        return f"{config}{color}"
+
+    def _config_with_color(self, config, color) -> str:
+        """速别格式下配置列包含颜色信息：渐变色产品或配置中已有该颜色时不再拼接"""
+        if color and str(color).strip() != '':
+            if '渐变' in str(color) or str(color) in config:
+                return config
+            return f"{config}{color}"
+        return config
+
+    def _build_profit_frame(self, df: pd.DataFrame, positions: np.ndarray, configs: np.ndarray,
+                            use_size_format: bool) -> pd.DataFrame:
+        """按选出的行整列组装毛利表
+
+        价格、成本、毛利、毛利率先按原始数据的取值记录，由 _calculate_margins 统一转换和计算。
+        """
+        if len(positions) == 0:
+            return pd.DataFrame()
+
+        source = df.iloc[positions].reset_index(drop=True)
+
+        def column(col):
+            if col not in source.columns:
+                return np.full(len(source), '', dtype=object)
+            return source[col].to_numpy(dtype=object)
+
+        if not use_size_format:
+            # 配置列包含颜色信息 - 特殊处理渐变色
+            configs = map_pairs(pd.Series(configs), pd.Series(column('颜色')), self._config_with_color)
+
+        names = source['简称'].astype(object).where(source['简称'].notna(), '') if '简称' in source.columns \
+            else pd.Series('', index=source.index, dtype=object)
+        # 根据格式类型构建不同的列：尺寸格式下速别列替换为尺寸列
+        layout_column = '尺寸' if use_size_format else '速别'
+        profit_df = pd.DataFrame({
+            '配置': configs,
+            layout_column: column(layout_column),
+            '简称': names.to_numpy(dtype=object),
+            '价格': column('价格'),
+            '成本': column('成本'),
+            '快递': np.full(len(source), PROFIT_TABLE_CONFIG['express_fee']),
+            '毛利润': column('毛利'),
+            '毛利率': column('毛利率')
+        })
+
+        # 匹配文本（隐藏列）：导出后重新导入时，反向改价直接用这些列作为匹配键
+        for hidden_col, visible_col in MATCH_KEY_COLUMNS.items():
+            if visible_col in profit_df.columns:
+                profit_df[hidden_col] = canonical_text(profit_df[visible_col]).to_numpy()
+        return profit_df
+
+    def _calculate_margins(self, profit_df: pd.DataFrame) -> pd.DataFrame:
+        """把金额列转换为浮点数并对整表计算毛利润、毛利率（小数）
+
+        价格、成本为空或无法识别时按0处理；原始数据有毛利、毛利率时直接使用（大于1的毛利率按百分数换算），
+        没有时毛利润 = 价格 - 成本（价格或成本是无法识别的文本时为0），毛利率 = 毛利润 / 价格（价格不大于0时为0）。
+        """
+        price, price_invalid = self._amount_column(profit_df['价格'])
+        cost, cost_invalid = self._amount_column(profit_df['成本'])
+        source_profit = to_number(profit_df['毛利润']).to_numpy()
+        source_rate = to_rate(profit_df['毛利率']).to_numpy()
+
+        derived_profit = np.where(price_invalid | cost_invalid, 0.0, price - cost)
+        profit = np.where(np.isnan(source_profit), derived_profit, source_profit)
+        rate = np.where(np.isnan(source_rate),
+                        np.divide(profit, price, out=np.zeros_like(price), where=price > 0), source_rate)
+
+        profit_df['价格'] = price
+        profit_df['成本'] = cost
+        profit_df['快递'] = profit_df['快递'].astype(float)
+        profit_df['毛利润'] = profit
+        profit_df['毛利率'] = rate
+        return profit_df
+
+    def _amount_column(self, series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """金额列转换为浮点数组（空值、空字符串为0），同时返回无法识别的文本所在行"""
+        values = to_number(series).to_numpy()
+        raw = series.to_numpy(dtype=object)
+        empty = pd.isna(raw) | (raw == '')
+        invalid = np.isnan(values) & ~empty
+        return np.nan_to_num(values, nan=0.0), invalid
 
     def _sort_profit_table(self, df: pd.DataFrame) -> pd.DataFrame:
-        """对毛利表进行排序"""
-        config_max_prices = {}
-        for config in df['配置'].unique():
-            config_data = df[df['配置'] == config]
-            max_price = 0
-            for _, row in config_data.iterrows():
-                try:
-                    price_val = float(str(row['价格']).replace(',', '')) if row['价格'] and row['价格'] != '' else 0
-                    max_price = max(max_price, price_val)
-                except:
-                    pass
-            config_max_prices[config] = max_price
-
-        sorted_configs = sorted(config_max_prices.items(), key=lambda x: x[1])
-        sorted_data = []
-        for config, _ in sorted_configs:
-            config_data = df[df['配置'] == config]
-            
-            # 根据表格中存在的列进行排序
-            if '速别' in config_data.columns:
-                config_data = config_data.sort_values('速别')
-            elif '尺寸' in config_data.columns:
-                # 按尺寸排序，动态提取数字进行排序
-                config_data = config_data.copy()  # 避免SettingWithCopyWarning
-                
-                def extract_size_number(size_str):
-                    """从尺寸字符串中提取数字用于排序"""
-                    if pd.isna(size_str) or size_str == '':
-                        return 999  # 空值排在最后
-                    
-                    import re
-                    match = re.search(r'(\d+(?:\.\d+)?)', str(size_str))
-                    if match:
-                        return float(match.group(1))
-                    return 999  # 无法解析的排在最后
-                
-                config_data['尺寸排序'] = config_data['尺寸'].apply(extract_size_number)
-                config_data = config_data.sort_values('尺寸排序').drop(columns=['尺寸排序'])
-            
-            sorted_data.append(config_data)
+        """对毛利表进行排序
+
+        配置按最高价升序排列（低于0的按0处理，相同时按配置首次出现的顺序），同一配置的行排在一起；
+        配置内有速别列时按速别编码（速数）排序，"7速"排在"21速"前面，编码相同时按速别文字排序；
+        否则按尺寸数值排序。各排序键整列计算后做一次稳定的多键排序。
+        """
+        if df.empty:
+            return df
+        order = self._sort_order(df, self.profit_row_keys(df))
+        return df.iloc[order].reset_index(drop=True)
+
+    def _sort_order(self, df: pd.DataFrame, row_keys: pd.DataFrame) -> np.ndarray:
+        """_sort_profit_table 的排列顺序（行号），row_keys 为 profit_row_keys 的结果"""
+        if df.empty:
+            return np.array([], dtype=np.int64)
+
+        config_codes = pd.factorize(df['配置'])[0]
+        prices = pd.Series(to_number(df['价格']).fillna(0.0).to_numpy())
+        sort_keys = [
+            prices.groupby(config_codes).transform('max').clip(lower=0).to_numpy(),
+            config_codes
+        ]
+
+        # 根据表格中存在的列进行排序
+        if '速别编码' in row_keys.columns:
+            sort_keys += [row_keys['速别编码'].to_numpy(), _text_rank(df['速别'])]
+        elif '尺寸数值' in row_keys.columns:
+            sort_keys.append(row_keys['尺寸数值'].to_numpy())
+
+        # np.lexsort 以最后一个键为主键，且为稳定排序
+        return np.lexsort(sort_keys[::-1])
+
+
+def speed_sort_key(speeds: pd.Series) -> np.ndarray:
+    """速别排序键：速别编码（每个不同的速别只计算一次）"""
+    codes, uniques = pd.factorize(speeds, use_na_sentinel=False)
+    speed_codes = np.array([speed_to_code(speed) for speed in np.asarray(uniques, dtype=object)], dtype=np.int64)
+    return speed_codes[codes] if len(speed_codes) else np.array([], dtype=np.int64)
+
+
+def size_sort_key(sizes: pd.Series) -> np.ndarray:
+    """尺寸排序键：尺寸中的数字（如"27.5寸"为27.5），空值和无法解析的排在最后（999）"""
+    numbers = sizes.astype(str).str.extract(r'(\d+(?:\.\d+)?)', expand=False)
+    return pd.to_numeric(numbers, errors='coerce').fillna(999).to_numpy(dtype=float)
+
+
+def _text_rank(values: pd.Series) -> np.ndarray:
+    """按文字排序的名次（相同文字名次相同），空值排在最后"""
+    codes, uniques = pd.factorize(values)
+    ranks = np.empty(len(uniques) + 1, dtype=np.int64)
+    ranks[np.asarray(pd.Index(uniques).argsort())] = np.arange(len(uniques))
+    ranks[-1] = len(uniques)
+    return ranks[codes]
+
+
+def config_runs(profit_table: pd.DataFrame) -> pd.DataFrame:
+    """毛利表中配置相同的连续行段：每段一行，包含配置、起始行号 start 和结束行号 stop（不含）
+
+    排序后同一配置的行是连续的，界面显示和Excel合并单元格按这些行段处理，不必逐行比较。
+    空配置按空字符串处理。
+    """
+    if '配置' not in profit_table.columns or profit_table.empty:
+        return pd.DataFrame({'配置': pd.Series([], dtype=object), 'start': pd.Series([], dtype=np.int64),
+                             'stop': pd.Series([], dtype=np.int64)})
 
-        return pd.concat(sorted_data, ignore_index=True) if sorted_data else df
\ No newline at end of file
+    configs = profit_table['配置'].astype(object).where(profit_table['配置'].notna(), '').astype(str).to_numpy(dtype=object)
+    starts = np.flatnonzero(np.r_[True, configs[1:] != configs[:-1]])
+    stops = np.r_[starts[1:], len(configs)]
+    return pd.DataFrame({'配置': configs[starts], 'start': starts, 'stop': stops})
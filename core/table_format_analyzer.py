@@ -3,7 +3,7 @@
 """
 
 import pandas as pd
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import sys
 import os
 
@@ -16,6 +16,8 @@ except ImportError:
     import logging
     logger = logging.getLogger(__name__)
 
+from core.dataset_stats import DatasetStats
+
 
 class TableFormatAnalyzer:
     """表格格式分析器类，负责分析数据特征并决定毛利表的显示格式"""
@@ -23,9 +25,15 @@ class TableFormatAnalyzer:
     def __init__(self):
         pass
 
-    def analyze_data_characteristics(self, df: pd.DataFrame) -> Dict:
-        """分析数据特征，返回分析结果"""
+    def analyze_data_characteristics(self, df: pd.DataFrame, stats: Optional[DatasetStats] = None) -> Dict:
+        """分析数据特征，返回分析结果
+
+        Args:
+            df: 数据
+            stats: df 的统计上下文，已统计过的列不再扫描；为None时新建
+        """
         try:
+            stats = stats or DatasetStats(df)
             result = {
                 'size_count': 0,
                 'speed_count': 0,
@@ -37,17 +45,15 @@ class TableFormatAnalyzer:
             
             # 统计尺寸项数量
             if '尺寸' in df.columns:
-                unique_sizes = df['尺寸'].dropna().unique()
-                # 过滤掉空字符串
-                unique_sizes = [size for size in unique_sizes if size and str(size).strip() != '']
+                # 过滤掉空值和空字符串
+                unique_sizes = stats.unique_values('尺寸')
                 result['unique_sizes'] = list(unique_sizes)
                 result['size_count'] = len(unique_sizes)
             
             # 统计速别项数量
             if '速别' in df.columns:
-                unique_speeds = df['速别'].dropna().unique()
-                # 过滤掉空字符串
-                unique_speeds = [speed for speed in unique_speeds if speed and str(speed).strip() != '']
+                # 过滤掉空值和空字符串
+                unique_speeds = stats.unique_values('速别')
                 result['unique_speeds'] = list(unique_speeds)
                 result['speed_count'] = len(unique_speeds)
             
@@ -9,6 +9,11 @@ import sys
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from config.settings import MATCH_REPORT_CONFIG, PROFIT_TABLE_CONFIG
+from core.profit_calculator import config_runs
+from utils.match_keys import MATCH_KEY_COLUMNS
+from utils.numeric import RATE_STATUS_COLUMN, RATE_STATUS_LABELS
+
 try:
     from utils.logger import logger
 except ImportError:
@@ -63,6 +68,13 @@ class ExcelExporter:
             '毛利率': 15
         }
 
+        # 匹配报告列宽设置，其余列为15
+        self.match_report_widths = {
+            '简称': 35,
+            '匹配键': 35,
+            '匹配方式': 22
+        }
+
     def export_profit_table(self, file_path: str, profit_table: pd.DataFrame, original_data: pd.DataFrame = None):
         """导出毛利表到Excel文件"""
         try:
@@ -108,8 +120,8 @@ class ExcelExporter:
         
         return profit_table[final_order]
 
-    def export_original_data(self, file_path: str, data: pd.DataFrame):
-        """导出原始数据到Excel文件"""
+    def export_original_data(self, file_path: str, data: pd.DataFrame, match_report=None):
+        """导出原始数据到Excel文件，传入匹配报告（MatchReport）时另存一个匹配报告工作表"""
         try:
             # 准备导出数据：移除"未匹配"列，确保"新毛利率"列存在
             export_data = data.copy()
@@ -118,6 +130,12 @@ class ExcelExporter:
             if '未匹配' in export_data.columns:
                 export_data = export_data.drop(columns=['未匹配'])
             
+            # 新毛利率为小数，按毛利率状态把无法计算、计算错误的行显示为文字
+            if RATE_STATUS_COLUMN in export_data.columns:
+                status_labels = export_data.pop(RATE_STATUS_COLUMN).map(RATE_STATUS_LABELS)
+                if '新毛利率' in export_data.columns:
+                    export_data['新毛利率'] = export_data['新毛利率'].astype(object).where(status_labels.isna(), status_labels)
+
             # 如果没有"新毛利率"列，添加一个空列
             if '新毛利率' not in export_data.columns:
                 export_data['新毛利率'] = "无法计算"
@@ -128,6 +146,9 @@ class ExcelExporter:
                 
                 # 格式化原始数据表
                 self._format_original_data_table(writer, export_data, data)
+
+                if match_report is not None and MATCH_REPORT_CONFIG["export_sheet"]:
+                    self._write_match_report(writer, match_report)
                 
                 logger.info(f"原始数据已导出到: {file_path}")
                 
@@ -215,6 +236,14 @@ class ExcelExporter:
             name_header_cell.alignment = self.center_alignment
             name_header_cell.font = self.header_font
             name_header_cell.border = self.border_thin
+
+        # 匹配文本列隐藏，表头同样跨两行，重新导入毛利表时作为列名读取
+        for hidden_col in MATCH_KEY_COLUMNS:
+            if hidden_col in profit_table.columns:
+                hidden_col_idx = profit_table.columns.get_loc(hidden_col) + 1
+                worksheet.merge_cells(start_row=1, start_column=hidden_col_idx, end_row=2, end_column=hidden_col_idx)
+                worksheet.cell(row=1, column=hidden_col_idx, value=hidden_col)
+                worksheet.column_dimensions[get_column_letter(hidden_col_idx)].hidden = True
         
         # 应用表头样式（第2行）
         for col_num, column_title in enumerate(profit_table.columns, 1):
@@ -238,6 +267,10 @@ class ExcelExporter:
                 cell.border = self.border_thin
                 
                 column_name = profit_table.columns[col_num-1]
+
+                # 金额列保存为数值，用单元格格式显示两位小数
+                if column_name in PROFIT_TABLE_CONFIG['amount_columns']:
+                    cell.number_format = PROFIT_TABLE_CONFIG['amount_format']
                 
                 # 设置毛利润公式：价格 - 成本 - 快递
                 if column_name == '毛利润':
@@ -257,7 +290,7 @@ class ExcelExporter:
                     if price_col_letter and profit_col_letter:
                         formula = f"=IF({price_col_letter}{row_num}=0,0,{profit_col_letter}{row_num}/{price_col_letter}{row_num})"
                         cell.value = formula
-                        cell.number_format = '0.00%'  # 设置为百分比格式
+                        cell.number_format = PROFIT_TABLE_CONFIG['rate_format']  # 设置为百分比格式
                     
                     cell.fill = self.profit_rate_fill
                 
@@ -269,37 +302,20 @@ class ExcelExporter:
         # 不再自动调整列宽，使用预设的22字符宽度
 
     def _merge_category_cells(self, worksheet, profit_table: pd.DataFrame, start_row=3):
-        """合并相同配置名的单元格"""
+        """合并相同配置名的单元格（按毛利表的配置行段合并，数据从 start_row 行开始）"""
         if '配置' not in profit_table.columns:
             return
             
         category_col_idx = profit_table.columns.get_loc('配置') + 1  # Excel列从1开始
         
-        current_config = None
-        merge_start_row = start_row  # 数据开始行
-        merge_ranges = []
-        
-        for row_idx in range(start_row, len(profit_table) + start_row):
-            category_value = worksheet.cell(row=row_idx, column=category_col_idx).value
-            
-            if category_value != current_config:
-                if current_config is not None and (row_idx - merge_start_row) > 1:
-                    # 需要合并的行范围
-                    merge_ranges.append((merge_start_row, row_idx - 1))
-                current_config = category_value
-                merge_start_row = row_idx
-        
-        # 处理最后一组
-        if current_config is not None and (len(profit_table) + start_row - merge_start_row) > 1:
-            merge_ranges.append((merge_start_row, len(profit_table) + start_row - 1))
-        
         # 执行合并
-        for start, end in merge_ranges:
-            if end > start:  # 只有多行才需要合并
-                worksheet.merge_cells(start_row=start, start_column=category_col_idx, 
-                                    end_row=end, end_column=category_col_idx)
+        runs = config_runs(profit_table)
+        for start, stop in zip(runs['start'], runs['stop']):
+            if stop - start > 1:  # 只有多行才需要合并
+                worksheet.merge_cells(start_row=start_row + int(start), start_column=category_col_idx, 
+                                    end_row=start_row + int(stop) - 1, end_column=category_col_idx)
                 # 设置合并后单元格的垂直居中
-                cell = worksheet.cell(row=start, column=category_col_idx)
+                cell = worksheet.cell(row=start_row + int(start), column=category_col_idx)
                 cell.alignment = Alignment(horizontal='center', vertical='center')
 
     def _auto_adjust_column_widths(self, worksheet, profit_table: pd.DataFrame, header_row=2):
@@ -386,6 +402,32 @@ class ExcelExporter:
                     # 为新毛利率列设置百分比样式的背景色
                     profit_rate_light_fill = PatternFill(start_color='F0F8FF', end_color='F0F8FF', fill_type='solid')  # 淡蓝色背景
                     cell.fill = profit_rate_light_fill
+                    if isinstance(cell.value, (int, float)):
+                        cell.number_format = PROFIT_TABLE_CONFIG['rate_format']
+
+    def _write_match_report(self, writer, match_report):
+        """匹配报告工作表：左侧为逐行匹配结果，右侧为各匹配方式的行数"""
+        sheet_name = MATCH_REPORT_CONFIG["sheet_name"]
+        rows = match_report.rows
+        counts = match_report.counts_frame()
+        rows.to_excel(writer, sheet_name=sheet_name, index=False)
+        counts.to_excel(writer, sheet_name=sheet_name, index=False, startcol=len(rows.columns) + 1)
+
+        worksheet = writer.sheets[sheet_name]
+        header_columns = list(range(1, len(rows.columns) + 1)) + \
+            list(range(len(rows.columns) + 2, len(rows.columns) + len(counts.columns) + 2))
+        for col_num in header_columns:
+            cell = worksheet.cell(row=1, column=col_num)
+            cell.font = self.header_font
+            cell.alignment = self.center_alignment
+            cell.border = self.border_thin
+            worksheet.column_dimensions[get_column_letter(col_num)].width = self.match_report_widths.get(str(cell.value), 15)
+
+        # 价格列使用金额格式
+        for col in ('原价格', '修改后价格', '价格变化'):
+            col_letter = get_column_letter(rows.columns.get_loc(col) + 1)
+            for cell in worksheet[col_letter][1:]:
+                cell.number_format = PROFIT_TABLE_CONFIG['amount_format']
 
     def _show_export_completion(self, file_path: str, file_type: str):
         """显示导出完成提示并提供打开文件选项"""
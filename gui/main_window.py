@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import pandas as pd
+import numbers
 import sys
 import os
 from typing import Optional
@@ -9,6 +10,10 @@ from typing import Optional
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
 
+from config.settings import PROFIT_TABLE_CONFIG
+from core.profit_calculator import config_runs
+from utils.match_keys import MATCH_KEY_COLUMNS
+
 try:
     from processors.data_processor import DataProcessor
     from exporters.excel_exporter import ExcelExporter
@@ -42,6 +47,7 @@ class MainWindow:
         self.processed_data = None
         self.profit_table_data = None
         self.updated_data = None
+        self.match_report = None
         
         # 初始化UI组件
         self.profit_tree = None
@@ -280,10 +286,12 @@ class MainWindow:
                 self.updated_data = self.data_processor.update_prices(
                     self.original_data.copy(), modified_profit_table
                 )
+                self.match_report = self.data_processor.get_match_report()
 
                 # 显示成功消息
                 self.status_label.config(
-                    text="已成功导入更新后的毛利表，可以使用'导出改价后原始数据'按钮导出", 
+                    text=f"已成功导入更新后的毛利表（匹配成功{self.match_report.matched_count}行，"
+                         f"未匹配{self.match_report.unmatched_count}行），可以使用'导出改价后原始数据'按钮导出",
                     foreground="green"
                 )
 
@@ -327,8 +335,8 @@ class MainWindow:
             self.profit_tree.delete(item)
 
         if self.profit_table_data is not None:
-            # 设置列
-            columns = list(self.profit_table_data.columns)
+            # 设置列（匹配文本列为隐藏列，不显示）
+            columns = [col for col in self.profit_table_data.columns if col not in MATCH_KEY_COLUMNS]
             self.profit_tree['columns'] = columns
             self.profit_tree['show'] = 'headings'
 
@@ -340,27 +348,29 @@ class MainWindow:
                 else:
                     self.profit_tree.column(col, width=120, minwidth=80)
 
-            # 插入数据
-            previous_category = None
-            for index, row in self.profit_table_data.iterrows():
+            # 插入数据：同一配置的连续行只在第一行显示配置名
+            run_starts = set(config_runs(self.profit_table_data)['start'].tolist())
+            for position, (index, row) in enumerate(self.profit_table_data.iterrows()):
                 values = []
                 for col in columns:
                     if col == '配置':
-                        current_category = str(row[col]) if pd.notna(row[col]) else ""
-                        if current_category == previous_category:
-                            values.append("")
-                        else:
-                            values.append(current_category)
-                            previous_category = current_category
+                        values.append(str(row[col]) if pd.notna(row[col]) and position in run_starts else "")
                     else:
-                        cell_value = row[col]
-                        if pd.isna(cell_value):
-                            values.append("")
-                        else:
-                            values.append(str(cell_value))
+                        values.append(self.format_profit_cell(col, row[col]))
 
                 self.profit_tree.insert("", tk.END, values=values)
 
+    def format_profit_cell(self, col, cell_value) -> str:
+        """毛利表单元格的显示文字：金额保留两位小数，毛利率（小数）显示为百分比"""
+        if pd.isna(cell_value):
+            return ""
+        if isinstance(cell_value, numbers.Real) and not isinstance(cell_value, bool):
+            if col in PROFIT_TABLE_CONFIG['rate_columns']:
+                return f"{cell_value:.2%}"
+            if col in PROFIT_TABLE_CONFIG['amount_columns']:
+                return f"{cell_value:.2f}"
+        return str(cell_value)
+
     def export_excel(self):
         """导出毛利表到Excel"""
         if self.profit_table_data is None:
@@ -389,8 +399,10 @@ class MainWindow:
             return
 
         # 使用更新后的数据（如果存在），否则使用原始数据
+        match_report = None
         if self.updated_data is not None:
             export_data = self.updated_data
+            match_report = self.match_report
         else:
             export_data = self.original_data.copy()
             messagebox.showinfo("提示", "请先导入更新后的毛利表，当前导出的数据将使用原价格")
@@ -403,7 +415,7 @@ class MainWindow:
 
         if file_path:
             try:
-                self.excel_exporter.export_original_data(file_path, export_data)
+                self.excel_exporter.export_original_data(file_path, export_data, match_report)
                 messagebox.showinfo("成功", f"修改后的原始数据表已保存到：{file_path}")
                 self.status_label.config(text="原始数据导出成功", foreground="green")
             except Exception as e:
@@ -0,0 +1,8 @@
+"""
+导入器模块
+包含各种数据导入相关的功能
+"""
+
+from .excel_importer import ExcelImporter
+
+__all__ = ['ExcelImporter']
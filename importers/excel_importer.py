@@ -0,0 +1,211 @@
+"""
+Excel导入器 - 单次读取Excel文件，读取表头的同时识别ID列
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import sys
+import os
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.logger import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+from pandas.io.parsers import TextParser
+
+# openpyxl 可以流式读取的格式，其余格式（如 .xls）交给 pandas 处理
+STREAMING_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+
+
+def is_id_column(column) -> bool:
+    """判断列名是否为ID列（ID列需要保持字符串格式，防止精度丢失）"""
+    column = str(column)
+    return 'ID' in column or 'id' in column or '货品ID' in column or '规格ID' in column
+
+
+class ExcelImporter:
+    """Excel导入类，负责将Excel文件一次性读取为DataFrame"""
+
+    def read_excel(self, file_path: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """读取Excel文件，ID列保持为字符串格式
+
+        xlsx 文件使用 openpyxl 只读模式流式读取，表头行读出后立即确定ID列的
+        类型，随后继续读取数据行，整个文件只解析一次。
+
+        Args:
+            file_path: Excel文件路径
+            columns: 需要读取的列名，为None时读取全部列；ID列总是会被读取
+        """
+        if str(file_path).lower().endswith(STREAMING_EXTENSIONS):
+            return self._read_xlsx(file_path, columns)
+        return self._read_with_pandas(file_path, columns)
+
+    def iter_chunks(self, file_path: str, chunk_size: int,
+                    columns: Optional[Iterable[str]] = None) -> Iterator[pd.DataFrame]:
+        """按固定行数分块读取Excel文件，每块都是独立的DataFrame
+
+        每块的行索引与整表读取时的行号一致；行宽以表头为准，中间的空行保留、
+        末尾的空行丢弃，与 read_excel 的结果保持一致。
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"分块行数必须大于0: {chunk_size}")
+
+        if not str(file_path).lower().endswith(STREAMING_EXTENSIONS):
+            # 非 xlsx 格式无法流式读取，整表读取后再分块
+            df = self._read_with_pandas(file_path, columns)
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size]
+            return
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            header, rows = self._open_sheet_rows(workbook.worksheets[0], columns)
+            if not header:
+                return
+
+            dtype_dict = self._build_dtype_dict(header)
+            width = len(header)
+            chunk_rows: List[List[Any]] = []
+            pending_empty_rows = 0
+            start = 0
+
+            for row in rows:
+                if not row:
+                    # 空行先挂起，后面还有数据时才计入
+                    pending_empty_rows += 1
+                    continue
+
+                while pending_empty_rows:
+                    chunk_rows.append([''] * width)
+                    pending_empty_rows -= 1
+                    if len(chunk_rows) >= chunk_size:
+                        yield self._parse_chunk(header, chunk_rows, dtype_dict, start)
+                        start += len(chunk_rows)
+                        chunk_rows = []
+
+                chunk_rows.append((row + [''] * (width - len(row)))[:width])
+                if len(chunk_rows) >= chunk_size:
+                    yield self._parse_chunk(header, chunk_rows, dtype_dict, start)
+                    start += len(chunk_rows)
+                    chunk_rows = []
+
+            if chunk_rows:
+                yield self._parse_chunk(header, chunk_rows, dtype_dict, start)
+        finally:
+            workbook.close()
+
+    def _parse_chunk(self, header: List[Any], chunk_rows: List[List[Any]],
+                     dtype_dict: Dict[Any, type], start: int) -> pd.DataFrame:
+        """把一块原始行解析为DataFrame，行索引从整表行号start开始"""
+        chunk = TextParser([header] + chunk_rows, header=0, dtype=dtype_dict).read()
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        return chunk
+
+    def _read_xlsx(self, file_path: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """使用 openpyxl 只读模式单次读取 xlsx 文件"""
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            header, rows = self._open_sheet_rows(workbook.worksheets[0], columns)
+            if header is None:
+                return pd.DataFrame()
+
+            dtype_dict = self._build_dtype_dict(header)
+            data = self._collect_rows(header, rows)
+            if not data:
+                return pd.DataFrame()
+            return TextParser(data, header=0, dtype=dtype_dict).read()
+        finally:
+            workbook.close()
+
+    def _read_with_pandas(self, file_path: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """非 xlsx 格式：只打开一次工作簿，先解析表头再解析数据"""
+        usecols = None
+        if columns is not None:
+            wanted = set(columns)
+            usecols = lambda col: col in wanted or is_id_column(col)
+
+        with pd.ExcelFile(file_path) as excel_file:
+            header = excel_file.parse(nrows=0, usecols=usecols)
+            dtype_dict = self._build_dtype_dict(header.columns)
+            return excel_file.parse(usecols=usecols, dtype=dtype_dict)
+
+    def _build_dtype_dict(self, columns) -> Dict[Any, type]:
+        """根据表头构建列类型映射，ID列指定为字符串类型"""
+        return {col: str for col in columns if col != '' and is_id_column(col)}
+
+    def _open_sheet_rows(self, sheet, columns: Optional[Iterable[str]] = None
+                         ) -> Tuple[Optional[List[Any]], Iterator[List[Any]]]:
+        """读取表头，返回（表头, 数据行迭代器）
+
+        指定 columns 时只转换所需列（及ID列）的单元格，其余列在读取时直接跳过。
+        """
+        sheet.reset_dimensions()
+        raw_rows = iter(sheet.rows)
+        first_row = next(raw_rows, None)
+        if first_row is None:
+            return None, iter(())
+
+        header = self._convert_row(first_row)
+        positions = None
+        if columns is not None:
+            wanted = set(columns)
+            positions = [i for i, col in enumerate(header)
+                         if col in wanted or (col != '' and is_id_column(col))]
+            header = [header[i] for i in positions]
+
+        return header, (self._convert_row(cells, positions) for cells in raw_rows)
+
+    def _convert_row(self, cells, positions: Optional[List[int]] = None) -> List[Any]:
+        """转换一行单元格，取值规则与 pandas.read_excel 保持一致
+
+        未指定 positions 时去掉行尾的空单元格；指定时返回所选列，
+        整行为空时返回空列表，以便按整行判断空行。
+        """
+        if positions is None:
+            converted_row = [self._convert_cell(cell) for cell in cells]
+            # 去掉行尾的空单元格
+            while converted_row and converted_row[-1] == '':
+                converted_row.pop()
+            return converted_row
+
+        cells = tuple(cells)
+        if all(cell.value is None or cell.value == '' for cell in cells):
+            return []
+        return [self._convert_cell(cells[i]) if i < len(cells) else '' for i in positions]
+
+    def _convert_cell(self, cell) -> Any:
+        """转换单个单元格的值"""
+        value = cell.value
+        if value is None:
+            return ''
+        if cell.data_type == TYPE_ERROR:
+            return np.nan
+        if cell.data_type == TYPE_NUMERIC:
+            int_value = int(value)
+            return int_value if int_value == value else float(value)
+        return value
+
+    def _collect_rows(self, header: List[Any], rows: Iterator[List[Any]]) -> List[List[Any]]:
+        """收集数据行，去掉末尾空行并补齐行宽"""
+        data = [header]
+        last_row_with_data = 0 if header else -1
+        for row in rows:
+            if row:
+                last_row_with_data = len(data)
+            data.append(row)
+
+        data = data[:last_row_with_data + 1]
+
+        if data:
+            max_width = max(len(row) for row in data)
+            data = [row + [''] * (max_width - len(row)) if len(row) < max_width else row
+                    for row in data]
+        return data
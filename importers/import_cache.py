@@ -0,0 +1,207 @@
+"""
+导入缓存 - 以文件内容哈希为键，把解析后的DataFrame按列缓存到本地磁盘
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import uuid
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import IMPORT_CACHE_CONFIG
+
+try:
+    from utils.logger import logger
+except ImportError:
+    import logging
+    logger = logging.getLogger(__name__)
+
+# 缓存格式版本，存储格式变化时递增，旧缓存自动失效
+CACHE_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+
+class ImportCache:
+    """导入缓存类，负责按内容哈希存取列式缓存并按最近使用时间淘汰
+
+    每个缓存条目是一个目录，每列保存为一个 .npy 文件，读取时使用内存映射：
+    - 数值、布尔列直接保存数组
+    - 日期列保存为 int64
+    - 字符串列（含ID列）保存为定长 unicode 数组和空值掩码，并记录原始 dtype
+    含有其他类型（如混合类型）列的数据不缓存。
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_size_mb: Optional[float] = None,
+                 enabled: Optional[bool] = None):
+        self.cache_dir = Path(cache_dir or IMPORT_CACHE_CONFIG["cache_dir"])
+        self.max_size_bytes = int((max_size_mb or IMPORT_CACHE_CONFIG["max_size_mb"]) * 1024 * 1024)
+        self.enabled = IMPORT_CACHE_CONFIG["enabled"] if enabled is None else enabled
+
+    def make_key(self, file_path: str, variant: str = '') -> str:
+        """根据文件内容生成缓存键，variant 用于区分同一文件的不同读取方式"""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        digest.update(f"|v{CACHE_FORMAT_VERSION}|{variant}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        """读取缓存，未命中或缓存损坏时返回None"""
+        if not self.enabled:
+            return None
+
+        entry_dir = self.cache_dir / key
+        manifest_path = entry_dir / MANIFEST_NAME
+        if not manifest_path.exists():
+            return None
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+            columns = {}
+            for position, column in enumerate(manifest['columns']):
+                columns[position] = self._load_column(entry_dir, column)
+
+            df = pd.DataFrame(columns, index=pd.RangeIndex(manifest['rows']))
+            df.columns = [column['name'] for column in manifest['columns']]
+
+            # 更新访问时间，用于LRU淘汰
+            os.utime(manifest_path)
+            return df
+        except Exception as e:
+            logger.warning(f"读取导入缓存失败，将重新解析文件: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+    def store(self, key: str, df: pd.DataFrame) -> bool:
+        """写入缓存，返回是否成功写入"""
+        if not self.enabled:
+            return False
+
+        if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+            return False
+
+        tmp_dir = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            tmp_dir.mkdir(parents=True)
+            manifest = {'rows': len(df), 'columns': []}
+            for position in range(df.shape[1]):
+                column = self._store_column(tmp_dir, position, df.columns[position], df.iloc[:, position])
+                if column is None:
+                    logger.info(f"列 {df.columns[position]} 的数据类型不支持缓存，跳过导入缓存")
+                    return False
+                manifest['columns'].append(column)
+
+            with open(tmp_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+
+            entry_size = self._dir_size(tmp_dir)
+            if entry_size > self.max_size_bytes:
+                logger.info("数据超过导入缓存容量上限，跳过导入缓存")
+                return False
+
+            entry_dir = self.cache_dir / key
+            if entry_dir.exists():
+                return True
+            os.replace(tmp_dir, entry_dir)
+
+            self._evict(keep=key)
+            return True
+        except Exception as e:
+            logger.warning(f"写入导入缓存失败: {e}")
+            return False
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def clear(self):
+        """清空全部缓存"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _store_column(self, entry_dir: Path, position: int, name, series: pd.Series) -> Optional[dict]:
+        """保存单列，返回列描述；不支持的类型返回None"""
+        if not isinstance(name, (str, int, float, bool)) and name is not None:
+            return None
+
+        column = {'name': name, 'dtype': str(series.dtype), 'file': f"c{position}.npy"}
+        dtype = series.dtype
+
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+            column['kind'] = 'numeric'
+            np.save(entry_dir / column['file'], series.to_numpy(), allow_pickle=False)
+            return column
+
+        if isinstance(dtype, np.dtype) and dtype.kind == 'M':
+            column['kind'] = 'datetime'
+            np.save(entry_dir / column['file'], series.to_numpy().view('int64'), allow_pickle=False)
+            return column
+
+        if dtype == object or pd.api.types.is_string_dtype(dtype):
+            values = series.to_numpy(dtype=object, na_value=np.nan)
+            null_mask = pd.isna(values)
+            non_null = values[~null_mask]
+            if not all(isinstance(value, str) for value in non_null):
+                return None
+            # numpy 的定长字符串会去掉末尾的空字符，这类值无法无损保存
+            if any(value.endswith('\x00') for value in non_null):
+                return None
+
+            filled = values.copy()
+            filled[null_mask] = ''
+            column['kind'] = 'string'
+            column['mask_file'] = f"c{position}_mask.npy"
+            np.save(entry_dir / column['file'], filled.astype(str), allow_pickle=False)
+            np.save(entry_dir / column['mask_file'], null_mask.astype(bool), allow_pickle=False)
+            return column
+
+        return None
+
+    def _load_column(self, entry_dir: Path, column: dict) -> pd.Series:
+        """使用内存映射读取单列"""
+        values = np.load(entry_dir / column['file'], mmap_mode='r', allow_pickle=False)
+
+        if column['kind'] == 'numeric':
+            return pd.Series(values, dtype=column['dtype'], copy=True)
+
+        if column['kind'] == 'datetime':
+            return pd.Series(np.asarray(values).view(column['dtype']), copy=True)
+
+        null_mask = np.load(entry_dir / column['mask_file'], mmap_mode='r', allow_pickle=False)
+        objects = values.astype(object)
+        objects[np.asarray(null_mask)] = np.nan
+        series = pd.Series(objects, dtype=object)
+        if column['dtype'] != 'object':
+            series = series.astype(column['dtype'])
+        return series
+
+    def _evict(self, keep: str):
+        """按最近使用时间淘汰缓存，直到总大小不超过上限"""
+        entries: List[Tuple[float, int, Path]] = []
+        for entry_dir in self.cache_dir.iterdir():
+            manifest_path = entry_dir / MANIFEST_NAME
+            if not entry_dir.is_dir() or not manifest_path.exists():
+                continue
+            entries.append((manifest_path.stat().st_mtime, self._dir_size(entry_dir), entry_dir))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size_bytes:
+                break
+            if entry_dir.name == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            logger.info(f"导入缓存超出容量，已淘汰: {entry_dir.name}")
+
+    def _dir_size(self, path: Path) -> int:
+        """计算目录大小（字节）"""
+        return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import multiprocessing
 import sys
 import os
 
@@ -28,4 +29,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # 打包为exe后，进程池的子进程需要由此处接管
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
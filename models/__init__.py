@@ -3,10 +3,12 @@
 定义项目中使用的数据结构和模型
 """
 
-from .data_models import ProfitTableRow, OriginalDataRow, ProcessingResult
+from .data_models import ProfitTableRow, OriginalDataRow, ProcessingResult, MatchReport, PriceSimulationResult
 
 __all__ = [
     'ProfitTableRow',
     'OriginalDataRow', 
-    'ProcessingResult'
+    'ProcessingResult',
+    'MatchReport',
+    'PriceSimulationResult'
 ]
\ No newline at end of file
@@ -3,23 +3,24 @@
 """
 
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+import numpy as np
 import pandas as pd
 
 
 @dataclass
 class ProfitTableRow:
-    """毛利表行数据模型"""
+    """毛利表行数据模型（金额为浮点数，毛利率为小数，显示时再格式化）"""
     config: str = ""
     speed: str = ""
     name: str = ""
-    price: str = "0.00"
-    cost: str = "0.00"
-    express: str = "30.00"
-    profit: str = "0.00"
-    profit_rate: str = "0.00%"
+    price: float = 0.0
+    cost: float = 0.0
+    express: float = 30.0
+    profit: float = 0.0
+    profit_rate: float = 0.0
     
-    def to_dict(self) -> Dict[str, str]:
+    def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
             '配置': self.config,
@@ -68,4 +69,52 @@ class ProcessingResult:
     
     def __post_init__(self):
         if self.data is not None and self.row_count == 0:
-            self.row_count = len(self.data)
\ No newline at end of file
+            self.row_count = len(self.data)
+
+
+@dataclass
+class MatchReport:
+    """改价匹配报告：每行原始数据的匹配结果（匹配键、匹配方式、价格变化），以及各匹配方式的行数"""
+    rows: pd.DataFrame
+    counts: Dict[str, int]
+    unmatched_methods: List[str]
+
+    @property
+    def unmatched_count(self) -> int:
+        return sum(self.counts.get(method, 0) for method in self.unmatched_methods)
+
+    @property
+    def matched_count(self) -> int:
+        return sum(self.counts.values()) - self.unmatched_count
+
+    def counts_frame(self) -> pd.DataFrame:
+        """各匹配方式的行数"""
+        return pd.DataFrame({'匹配方式': list(self.counts.keys()), '行数': list(self.counts.values())})
+
+
+@dataclass
+class PriceSimulationResult:
+    """改价模拟结果：毛利润、毛利率为 方案 × 产品 的矩阵（毛利率为小数）"""
+    scenarios: List[str]
+    products: pd.Index
+    ratios: np.ndarray
+    offsets: np.ndarray
+    prices: np.ndarray
+    profits: np.ndarray
+    rates: np.ndarray
+
+    @property
+    def new_prices(self) -> np.ndarray:
+        """各方案下的新价格矩阵"""
+        return self.prices[np.newaxis, :] * (1.0 + self.ratios[:, np.newaxis]) + self.offsets[:, np.newaxis]
+
+    def to_frame(self, metric: str = '毛利率') -> pd.DataFrame:
+        """转换为DataFrame：行为方案，列为毛利表的行索引
+
+        Args:
+            metric: '毛利率'、'毛利润' 或 '价格'（新价格）
+        """
+        values = {'毛利率': self.rates, '毛利润': self.profits, '价格': self.new_prices}.get(metric)
+        if values is None:
+            raise ValueError(f"不支持的指标: {metric}")
+        return pd.DataFrame(values, index=pd.Index(self.scenarios, name='方案'), columns=self.products)
@@ -30,13 +30,17 @@ class DataProcessor:
         self.speed_pattern = r'(\d+速)'
         self.color_patterns = [r'黑', r'白', r'红', r'蓝', r'绿', r'黄', r'灰', r'银', r'金', r'粉', r'紫', r'橙']
 
-    def import_excel_data(self, file_path: str) -> pd.DataFrame:
+    def import_excel_data(self, file_path: str, columns: list = None) -> pd.DataFrame:
         """导入Excel数据"""
-        return self.data_service.import_excel_data(file_path)
+        return self.data_service.import_excel_data(file_path, columns)
 
-    def process_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def process_data(self, df: pd.DataFrame, parallel: bool = None) -> pd.DataFrame:
         """处理原始数据"""
-        return self.data_service.process_data(df)
+        return self.data_service.process_data(df, parallel)
+
+    def iter_processed_chunks(self, file_path: str, chunk_size: int = None, columns: list = None):
+        """流式导入并处理数据，逐块返回处理结果"""
+        return self.data_service.iter_processed_chunks(file_path, chunk_size, columns)
 
     def generate_profit_table(self, df: pd.DataFrame) -> pd.DataFrame:
         """生成毛利表"""
@@ -46,6 +50,10 @@ class DataProcessor:
         """根据更新后的毛利表更新价格"""
         return self.data_service.update_prices(original_data, modified_profit_table)
 
+    def get_match_report(self):
+        """最近一次改价的匹配报告"""
+        return self.data_service.get_match_report()
+
     # ==================== 向后兼容方法 ====================
     
     def extract_info_from_name(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -74,22 +82,6 @@ class DataProcessor:
 
     # ==================== 委托给服务层的方法 ====================
     
-    def _add_profit_row(self, profit_data: list, row: pd.Series, config: str):
-        """添加毛利表行数据"""
-        return self.data_service.profit_calculator._add_profit_row(profit_data, row, config)
-
-    def _format_price(self, value) -> str:
-        """格式化价格"""
-        return self.data_service.profit_calculator._format_price(value)
-
-    def _format_profit(self, profit, price, cost) -> str:
-        """格式化毛利润"""
-        return self.data_service.profit_calculator._format_profit(profit, price, cost)
-
-    def _format_profit_rate(self, profit_rate, profit, price) -> str:
-        """格式化毛利率"""
-        return self.data_service.profit_calculator._format_profit_rate(profit_rate, profit, price)
-
     def _sort_profit_table(self, df: pd.DataFrame) -> pd.DataFrame:
         """对毛利表进行排序"""
         return self.data_service.profit_calculator._sort_profit_table(df)
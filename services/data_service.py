@@ -3,7 +3,9 @@
 """
 
 import pandas as pd
-from typing import Optional
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional
 import sys
 import os
 
@@ -12,67 +14,112 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     from utils.logger import logger
-    from core.data_extractor import DataExtractor
+    from config.settings import IMPORT_CONFIG, PARALLEL_CONFIG
+    from core.data_extractor import DataExtractor, parse_pairs_in_worker
+    from core.parse_store import ParseStore
     from core.data_filter import DataFilter
+    from core.dataset_stats import DatasetStats
     from core.price_matcher import PriceMatcher
+    from core.pricing_simulator import PricingSimulator
     from core.profit_calculator import ProfitCalculator
-    from models.data_models import ProcessingResult
+    from importers.excel_importer import ExcelImporter
+    from importers.import_cache import ImportCache
+    from models.data_models import MatchReport, PriceSimulationResult, ProcessingResult
 except ImportError as e:
     import logging
     logger = logging.getLogger(__name__)
     raise ImportError(f"导入模块失败: {e}")
 
 
+def _hash_column(series: pd.Series) -> np.ndarray:
+    """一列各单元格的哈希值：数值（包括布尔值）和空值按浮点数哈希，其余按文本哈希，与列的类型无关"""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return pd.util.hash_array(series.to_numpy(dtype='float64', na_value=np.nan))
+
+    # 其他列每个不同的取值只判断一次，空值编号为-1，对应末尾的NaN
+    codes, uniques = pd.factorize(series)
+    uniques = np.asarray(uniques, dtype=object)
+    if isinstance(series.dtype, pd.StringDtype):
+        # 文本列的取值都是字符串，不必逐个判断
+        is_number = np.zeros(len(uniques) + 1, dtype=bool)
+        texts = np.append(uniques, '')
+    else:
+        is_number = np.array([isinstance(value, (bool, np.bool_, int, np.integer, float, np.floating))
+                              for value in uniques] + [False])
+        texts = np.array(['' if number else str(value) for value, number in zip(uniques, is_number)] + [''], dtype=object)
+    is_number[-1] = True
+
+    numbers = np.full(len(uniques) + 1, np.nan)
+    numbers[:-1][is_number[:-1]] = uniques[is_number[:-1]].astype('float64')
+    return np.where(is_number, pd.util.hash_array(numbers), pd.util.hash_array(texts))[codes]
+
+
 class DataService:
     """数据服务类，整合所有数据处理流程"""
     
     def __init__(self):
-        self.data_extractor = DataExtractor()
+        self.data_extractor = DataExtractor(ParseStore())
         self.data_filter = DataFilter()
-        self.price_matcher = PriceMatcher()
+        self.price_matcher = PriceMatcher(self.data_extractor)
         self.profit_calculator = ProfitCalculator()
+        self.pricing_simulator = PricingSimulator()
+        self.excel_importer = ExcelImporter()
+        self.import_cache = ImportCache()
+
+    def get_required_columns(self) -> List[str]:
+        """汇总提取、筛选、毛利计算和改价各环节需要的原始数据列（ID列由导入器自动保留）"""
+        required_columns = []
+        for component in (self.data_extractor, self.data_filter, self.profit_calculator, self.price_matcher):
+            for col in component.required_columns:
+                if col not in required_columns:
+                    required_columns.append(col)
+        return required_columns
 
-    def import_excel_data(self, file_path: str) -> pd.DataFrame:
-        """导入Excel数据"""
+    def import_excel_data(self, file_path: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """导入Excel数据
+
+        Args:
+            file_path: Excel文件路径
+            columns: 只读取这些列（及ID列），为None时读取全部列
+        """
         try:
-            # 指定ID列为字符串类型，防止精度丢失
-            dtype_dict = {}
-            
-            # 预读取列名来识别ID列
-            temp_df = pd.read_excel(file_path, nrows=0)
-            for col in temp_df.columns:
-                if 'ID' in col or 'id' in col or '货品ID' in col or '规格ID' in col:
-                    dtype_dict[col] = str
-            
-            # 重新读取数据，指定ID列为字符串类型
-            df = pd.read_excel(file_path, dtype=dtype_dict)
+            # 同一文件内容重复导入时直接读取缓存，列投影不同的读取结果分别缓存
+            cache_variant = '' if columns is None else 'columns:' + '|'.join(sorted(set(columns)))
+            cache_key = self.import_cache.make_key(file_path, cache_variant) if self.import_cache.enabled else None
+            if cache_key:
+                df = self.import_cache.load(cache_key)
+                if df is not None:
+                    logger.info(f"从导入缓存读取数据，共{len(df)}行")
+                    return df
+
+            # 单次读取：读出表头后立即将ID列指定为字符串类型，防止精度丢失
+            df = self.excel_importer.read_excel(file_path, columns)
+            if cache_key:
+                self.import_cache.store(cache_key, df)
             logger.info(f"成功导入数据，共{len(df)}行，ID列已保持为字符串格式")
             return df
         except Exception as e:
             logger.error(f"导入Excel数据失败: {e}")
             raise
 
-    def process_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """处理原始数据"""
-        try:
-            # 复制数据避免修改原始数据
-            processed_df = df.copy()
+    def process_data(self, df: pd.DataFrame, parallel: Optional[bool] = None) -> pd.DataFrame:
+        """处理原始数据
 
-            # 删除货品ID和规格ID列
-            columns_to_drop = []
-            for col in processed_df.columns:
-                if '货品ID' in col or '规格ID' in col:
-                    columns_to_drop.append(col)
-
-            if columns_to_drop:
-                processed_df = processed_df.drop(columns=columns_to_drop)
+        Args:
+            df: 原始数据
+            parallel: 是否用进程池并行提取信息，为None时按配置决定；
+                去重后的组合数低于配置的阈值时总是串行处理
+        """
+        try:
+            # 删除货品ID和规格ID列（返回副本，避免修改原始数据）
+            processed_df = self._drop_id_columns(df)
 
             # 去重
             processed_df = processed_df.drop_duplicates()
 
             # 从简称中提取信息
             if '简称' in processed_df.columns:
-                processed_df = self.data_extractor.extract_info_from_name(processed_df)
+                processed_df = self._extract_info(processed_df, parallel)
 
             logger.info(f"数据处理完成，共{len(processed_df)}行")
             return processed_df
@@ -81,20 +128,115 @@ class DataService:
             logger.error(f"数据处理失败: {e}")
             raise
 
+    def iter_processed_chunks(self, file_path: str, chunk_size: Optional[int] = None,
+                              columns: Optional[Iterable[str]] = None) -> Iterator[pd.DataFrame]:
+        """流式导入并处理数据
+
+        按固定行数分块读取Excel，每块到达后立即完成删除ID列、去重和信息提取，读取和处理时
+        只需容纳一块原始数据。跨块的重复行通过行哈希识别，结果与整表 process_data 一致；
+        已出现过的行哈希保存在有序数组中，随去重后的行数增长（每行8字节）。
+        产出的各块由调用方决定是否保留。
+        """
+        chunk_size = chunk_size or IMPORT_CONFIG["chunk_size"]
+        seen_hashes = np.array([], dtype=np.uint64)
+        total_rows = 0
+        kept_rows = 0
+
+        try:
+            for chunk in self.excel_importer.iter_chunks(file_path, chunk_size, columns):
+                total_rows += len(chunk)
+                processed_chunk = self._drop_id_columns(chunk).drop_duplicates()
+
+                # 跨块去重：跳过之前块中已出现过的行
+                row_hashes = self._hash_rows(processed_chunk)
+                is_new = ~np.isin(row_hashes, seen_hashes, assume_unique=True)
+                seen_hashes = np.union1d(seen_hashes, row_hashes[is_new])
+                processed_chunk = processed_chunk[is_new]
+
+                if processed_chunk.empty:
+                    continue
+
+                if '简称' in processed_chunk.columns:
+                    processed_chunk = self.data_extractor.extract_info_from_name(processed_chunk)
+
+                kept_rows += len(processed_chunk)
+                yield processed_chunk
+
+            logger.info(f"流式数据处理完成，读取{total_rows}行，去重后共{kept_rows}行")
+
+        except Exception as e:
+            logger.error(f"流式数据处理失败: {e}")
+            raise
+
+    def _extract_info(self, df: pd.DataFrame, parallel: Optional[bool] = None) -> pd.DataFrame:
+        """从简称中提取信息，组合数较多时按组合分片并行解析"""
+        parallel = PARALLEL_CONFIG["enabled"] if parallel is None else parallel
+        max_workers = PARALLEL_CONFIG["max_workers"] or os.cpu_count() or 1
+
+        def parse(names: List[str], categories: List[str]) -> dict:
+            # 只有解析结果存储中没有的组合才会到这里，按这部分组合的数量决定是否并行
+            if not parallel or max_workers <= 1 or len(names) < PARALLEL_CONFIG["min_unique_pairs"]:
+                return self.data_extractor.parse_pairs(names, categories)
+            try:
+                return self._parse_pairs_parallel(names, categories, max_workers)
+            except Exception as e:
+                logger.warning(f"并行提取失败，改为串行提取: {e}")
+                return self.data_extractor.parse_pairs(names, categories)
+
+        pair_codes, names, categories = self.data_extractor.factorize_pairs(df)
+        extracted = self.data_extractor.resolve_pairs(names, categories, parse)
+        return self.data_extractor.assign_extracted(df, pair_codes, extracted)
+
+    def _parse_pairs_parallel(self, names: List[str], categories: List[str], max_workers: int) -> dict:
+        """把组合按顺序切成连续分片交给进程池解析，再按分片顺序拼接，结果与串行一致"""
+        # 分片数多于进程数，各进程负载更均衡
+        shard_size = -(-len(names) // (max_workers * 4))
+        starts = range(0, len(names), shard_size)
+        logger.info(f"并行提取：{len(names)}个组合，{len(starts)}个分片，{max_workers}个进程")
+
+        extracted = {col: [] for col in self.data_extractor.extracted_columns}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            shard_results = executor.map(
+                parse_pairs_in_worker,
+                [names[start:start + shard_size] for start in starts],
+                [categories[start:start + shard_size] for start in starts]
+            )
+            for shard_result in shard_results:
+                for col, values in shard_result.items():
+                    extracted[col].extend(values)
+        return extracted
+
+    def _drop_id_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """删除货品ID和规格ID列"""
+        columns_to_drop = [col for col in df.columns if '货品ID' in str(col) or '规格ID' in str(col)]
+        if columns_to_drop:
+            return df.drop(columns=columns_to_drop)
+        return df.copy()
+
+    def _hash_rows(self, df: pd.DataFrame) -> np.ndarray:
+        """计算每行的哈希值
+
+        数值不区分整数、浮点数和所在列的类型，空值不区分 None、NaN，与 drop_duplicates 判断重复的口径一致，
+        各块类型推断不同（如某块价格列混有文本）时仍能识别重复行。
+        """
+        column_hashes = {position: _hash_column(df.iloc[:, position]) for position in range(df.shape[1])}
+        return pd.util.hash_pandas_object(pd.DataFrame(column_hashes, index=df.index), index=False).to_numpy()
+
     def generate_profit_table(self, df: pd.DataFrame) -> pd.DataFrame:
         """生成毛利表"""
         try:
+            # 本次运行的统计上下文：一次统计尺寸、速别、配置、分类，格式分析和筛选共用
+            stats = DatasetStats(df).profile()
+
             # 先分析数据特征，决定使用哪种格式
-            from core.table_format_analyzer import TableFormatAnalyzer
-            analyzer = TableFormatAnalyzer()
-            analysis = analyzer.analyze_data_characteristics(df)
+            analysis = self.profit_calculator.format_analyzer.analyze_data_characteristics(df, stats)
             use_size_format = analysis['should_use_size_format']
             
             # 应用数据筛选规则，传递格式信息
-            df_filtered = self.data_filter.apply_data_filtering_rules(df, use_size_format)
+            df_filtered = self.data_filter.apply_data_filtering_rules(df, use_size_format, stats)
             
-            # 生成毛利表
-            profit_table = self.profit_calculator.generate_profit_table(df_filtered)
+            # 生成毛利表（筛选后的数据是新的数据集，单独统计）
+            profit_table = self.profit_calculator.generate_profit_table(df_filtered, DatasetStats(df_filtered))
             
             return profit_table
 
@@ -110,6 +252,18 @@ class DataService:
             logger.error(f"更新价格失败: {e}")
             raise
 
+    def get_match_report(self) -> Optional[MatchReport]:
+        """最近一次改价的匹配报告"""
+        return self.price_matcher.last_report
+
+    def simulate_prices(self, profit_table: pd.DataFrame, scenarios: Iterable) -> PriceSimulationResult:
+        """计算毛利表在多个改价方案（如 '+3%'、'+20元'）下的毛利润和毛利率"""
+        try:
+            return self.pricing_simulator.simulate(profit_table, scenarios)
+        except Exception as e:
+            logger.error(f"改价模拟失败: {e}")
+            raise
+
     def get_processing_summary(self, original_count: int, processed_count: int, profit_count: int) -> ProcessingResult:
         """获取处理摘要"""
         success = profit_count > 0
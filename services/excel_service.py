@@ -13,7 +13,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 try:
     from utils.logger import logger
     from exporters.excel_exporter import ExcelExporter
-    from models.data_models import ProcessingResult
+    from importers.excel_importer import ExcelImporter
+    from models.data_models import MatchReport, ProcessingResult
 except ImportError as e:
     import logging
     logger = logging.getLogger(__name__)
@@ -25,6 +26,7 @@ class ExcelService:
     
     def __init__(self):
         self.excel_exporter = ExcelExporter()
+        self.excel_importer = ExcelImporter()
 
     def export_profit_table(self, file_path: str, profit_table: pd.DataFrame, 
                           original_data: Optional[pd.DataFrame] = None) -> ProcessingResult:
@@ -44,10 +46,11 @@ class ExcelService:
                 message=f"导出毛利表失败: {str(e)}"
             )
 
-    def export_original_data(self, file_path: str, data: pd.DataFrame) -> ProcessingResult:
-        """导出原始数据"""
+    def export_original_data(self, file_path: str, data: pd.DataFrame,
+                             match_report: Optional[MatchReport] = None) -> ProcessingResult:
+        """导出原始数据，有匹配报告时一并导出"""
         try:
-            self.excel_exporter.export_original_data(file_path, data)
+            self.excel_exporter.export_original_data(file_path, data, match_report)
             
             return ProcessingResult(
                 success=True,
@@ -64,17 +67,8 @@ class ExcelService:
     def import_excel_file(self, file_path: str) -> ProcessingResult:
         """导入Excel文件"""
         try:
-            # 指定ID列为字符串类型，防止精度丢失
-            dtype_dict = {}
-            
-            # 预读取列名来识别ID列
-            temp_df = pd.read_excel(file_path, nrows=0)
-            for col in temp_df.columns:
-                if 'ID' in col or 'id' in col or '货品ID' in col or '规格ID' in col:
-                    dtype_dict[col] = str
-            
-            # 重新读取数据，指定ID列为字符串类型
-            df = pd.read_excel(file_path, dtype=dtype_dict)
+            # 单次读取：读出表头后立即将ID列指定为字符串类型，防止精度丢失
+            df = self.excel_importer.read_excel(file_path)
             
             return ProcessingResult(
                 success=True,
@@ -0,0 +1,319 @@
+"""
+增量毛利表 - 原始数据修改少量行后，只重新处理受影响的配置颜色组合
+"""
+
+import pandas as pd
+import numpy as np
+from collections import Counter
+from typing import Dict, Optional, Sequence
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from utils.logger import logger
+    from config.settings import INCREMENTAL_CONFIG
+    from core.dataset_stats import DatasetStats
+    from utils.categorical import add_categories, combine_columns, is_categorical
+except ImportError as e:
+    import logging
+    logger = logging.getLogger(__name__)
+    raise ImportError(f"导入模块失败: {e}")
+
+
+class IncrementalProfitTable:
+    """增量毛利表
+
+    全量生成时保存每行原始数据的提取结果、行哈希（用于去重）和所属的配置颜色组合，
+    以及毛利表各行来自哪个组合。之后原始数据有少量行被修改时：
+    只重新提取修改的行，只对受影响的组合重新筛选、生成毛利表行，替换进已有的毛利表后重新排列。
+
+    各组合的筛选和毛利表行互不影响，增量结果与对修改后的数据全量生成一致。以下情况退回全量生成：
+    修改的行数超过配置的比例、修改导致列类型变化、格式分析结论（速别格式/尺寸格式）改变、
+    筛选结果为空、筛选规则的结果没有按组合排列。
+    """
+
+    def __init__(self, data_service):
+        self.data_service = data_service
+        self.reset()
+
+    def reset(self):
+        """清除记录的状态（导入新数据后调用），之后的更新会全量生成"""
+        self.ready = False
+        self.profit_table: Optional[pd.DataFrame] = None
+        self._processed_data: Optional[pd.DataFrame] = None
+
+    @property
+    def processed_data(self) -> Optional[pd.DataFrame]:
+        """处理后的数据（删除ID列、去重并提取信息），与 DataService.process_data 的结果一致"""
+        if self._processed_data is None and self.ready:
+            self._processed_data = self.rows[self.kept]
+        return self._processed_data
+
+    def build(self, original_data: pd.DataFrame, parallel: Optional[bool] = None) -> pd.DataFrame:
+        """全量处理数据并生成毛利表，同时记录增量更新需要的状态"""
+        self.ready = False
+        self._processed_data = None
+
+        rows = self.data_service._drop_id_columns(original_data)
+        if '简称' not in rows.columns:
+            # 没有简称列时不做信息提取，也不支持增量更新
+            self._processed_data = self.data_service.process_data(original_data, parallel)
+            self.profit_table = self.data_service.generate_profit_table(self._processed_data)
+            return self.profit_table
+
+        self.source_columns = list(rows.columns)
+        self.source_dtypes = original_data.dtypes.copy()
+        # 增量更新时按行号改写，需要可写的数组
+        self.hashes = np.array(self.data_service._hash_rows(rows))
+        self.kept = np.array(~rows.duplicated().to_numpy())
+        # 重复行的提取结果与其首行相同，对全部行提取后取首行，结果与先去重再提取一致
+        self.rows = self.data_service._extract_info(rows, parallel)
+        # 配置颜色组合以整数编号记录，空组合为-1
+        self.combo_index: Dict[str, int] = {}
+        self.combo_first = np.array([], dtype=np.int64)
+        self.row_combos = self._combo_ids(combine_columns(self.rows['配置'], self.rows['颜色']))
+
+        processed = self._processed_data = self.rows[self.kept]
+        stats = DatasetStats(processed).profile()
+        analysis = self.data_service.profit_calculator.format_analyzer.analyze_data_characteristics(processed, stats)
+        self.filter_format = analysis['should_use_size_format']
+        self.size_counts = self._count_values(processed['尺寸'].to_numpy(dtype=object))
+        self.speed_counts = self._count_values(processed['速别'].to_numpy(dtype=object))
+
+        # 组合成员：未被去重的行按组合分组（行号递增），组合的顺序为首行行号
+        kept_positions = np.flatnonzero(self.kept)
+        kept_combos = self.row_combos[kept_positions]
+        self.combo_members: Dict[int, np.ndarray] = {
+            combo: kept_positions[indices]
+            for combo, indices in pd.Series(kept_combos).groupby(kept_combos, sort=False).indices.items() if combo >= 0
+        }
+        self._update_first(self.combo_members.keys())
+
+        selected = self.data_service.data_filter.select_rows(processed, self.filter_format, stats)
+        selected_combos = self._selected_combos(selected)
+        if selected.empty or not self._grouped_by_combo(selected_combos):
+            # 筛选结果为空时筛选器返回全部数据，筛选结果未按组合排列时各组合不能单独替换，按常规流程生成
+            self._processed_data = processed
+            self.profit_table = self.data_service.generate_profit_table(processed)
+            logger.info("当前数据不支持增量更新毛利表，已全量生成")
+            return self.profit_table
+
+        analysis = self.data_service.profit_calculator.format_analyzer.analyze_data_characteristics(
+            selected, DatasetStats(selected))
+        self.profit_format = analysis['should_use_size_format']
+        # 筛选结果各行的组合、尺寸、速别，受影响的组合重新筛选时按组合替换
+        self.selected_combos = selected_combos
+        self.selected_sizes = selected['尺寸'].to_numpy(dtype=object)
+        self.selected_speeds = selected['速别'].to_numpy(dtype=object)
+        self.selected_size_counts = self._count_values(self.selected_sizes)
+        self.selected_speed_counts = self._count_values(self.selected_speeds)
+
+        self.profit_rows, self.profit_keys, self.profit_combos, self.profit_sections, self.profit_order = \
+            self._build_rows(selected, selected_combos)
+        self.ready = True
+        self.profit_table = self._arrange()
+        logger.info(f"毛利表全量生成完成，共{len(self.profit_table)}行，{len(self.combo_members)}个组合")
+        return self.profit_table
+
+    def update_rows(self, original_data: pd.DataFrame, positions: Sequence[int]) -> pd.DataFrame:
+        """原始数据中 positions 位置（行号）的行已被修改，增量更新毛利表
+
+        Args:
+            original_data: 修改后的原始数据（行数和行顺序与全量生成时相同）
+            positions: 被修改的行号
+        """
+        positions = np.unique(np.asarray(positions, dtype=np.int64))
+        reason = self._fallback_reason(original_data, positions)
+        if reason:
+            logger.info(f"{reason}，全量重新生成毛利表")
+            return self.build(original_data)
+
+        try:
+            return self._update(original_data, positions)
+        except _FullRebuild as e:
+            logger.info(f"{e}，全量重新生成毛利表")
+        except Exception as e:
+            logger.warning(f"增量更新毛利表失败，全量重新生成: {e}")
+        return self.build(original_data)
+
+    def _fallback_reason(self, original_data: pd.DataFrame, positions: np.ndarray) -> str:
+        """不能增量更新的原因，可以增量更新时返回空字符串"""
+        if not self.ready:
+            return "尚未全量生成毛利表"
+        if len(original_data) != len(self.rows):
+            return "原始数据行数已变化"
+        if not original_data.dtypes.equals(self.source_dtypes):
+            return "原始数据列类型已变化"
+        if len(positions) > len(self.rows) * INCREMENTAL_CONFIG["max_changed_ratio"]:
+            return f"修改了{len(positions)}行，超过增量更新的比例"
+        return ""
+
+    def _update(self, original_data: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+        """增量更新：重新提取修改的行，重建受影响的组合"""
+        # 修改前的取值：只有修改的行取值会变，去重状态变化的其他行取值不变
+        old_kept = self.kept.copy()
+        old_values = {
+            position: (size, speed, combo) for position, size, speed, combo in zip(
+                positions, self.rows['尺寸'].iloc[positions].to_numpy(dtype=object),
+                self.rows['速别'].iloc[positions].to_numpy(dtype=object), self.row_combos[positions])
+        }
+
+        # 重新提取修改的行，写回全部行的提取结果
+        changed = self.data_service._drop_id_columns(original_data.iloc[positions])
+        old_hashes = self.hashes[positions]
+        self.hashes[positions] = self.data_service._hash_rows(changed)
+        extracted = self.data_service.data_extractor.extract_info_from_name(changed)
+        self._assign_rows(positions, extracted)
+        self.row_combos[positions] = self._combo_ids(combine_columns(extracted['配置'], extracted['颜色']))
+
+        # 去重状态可能变化的行：与修改前后的行内容哈希相同的行，在这些行中重新判断是否为首次出现
+        candidates = np.flatnonzero(np.isin(self.hashes, np.concatenate([old_hashes, self.hashes[positions]])))
+        self.kept[candidates] = ~self.rows.iloc[candidates][self.source_columns].duplicated().to_numpy()
+        affected_rows = np.union1d(positions, candidates[self.kept[candidates] != old_kept[candidates]])
+
+        affected_combos = set()
+        for position in affected_rows:
+            size, speed, combo = self.rows['尺寸'].iat[position], self.rows['速别'].iat[position], self.row_combos[position]
+            old_size, old_speed, old_combo = old_values.get(position, (size, speed, combo))
+            if old_kept[position]:
+                self._count_change(self.size_counts, old_size, -1)
+                self._count_change(self.speed_counts, old_speed, -1)
+                if old_combo >= 0:
+                    self._remove_member(old_combo, position)
+                    affected_combos.add(old_combo)
+            if self.kept[position]:
+                self._count_change(self.size_counts, size, 1)
+                self._count_change(self.speed_counts, speed, 1)
+                if combo >= 0:
+                    self._add_member(combo, position)
+                    affected_combos.add(combo)
+        self._processed_data = None
+        affected_combos = np.array(sorted(affected_combos), dtype=np.int64)
+        self._update_first(affected_combos)
+
+        if self._use_size_format(self.size_counts, self.speed_counts) != self.filter_format:
+            raise _FullRebuild("格式分析结论已变化")
+
+        # 受影响的组合重新筛选
+        live_combos = [combo for combo in affected_combos if combo in self.combo_members]
+        member_positions = np.sort(np.concatenate([self.combo_members[combo] for combo in live_combos])) \
+            if live_combos else np.array([], dtype=np.int64)
+        selected = self.data_service.data_filter.select_rows(self.rows.iloc[member_positions], self.filter_format)
+        selected_combos = self._selected_combos(selected)
+        if not self._grouped_by_combo(selected_combos):
+            raise _FullRebuild("筛选结果没有按组合排列")
+
+        # 替换受影响组合的筛选结果
+        removed = np.isin(self.selected_combos, affected_combos)
+        new_sizes = selected['尺寸'].to_numpy(dtype=object)
+        new_speeds = selected['速别'].to_numpy(dtype=object)
+        self.selected_size_counts.subtract(self._count_values(self.selected_sizes[removed]))
+        self.selected_speed_counts.subtract(self._count_values(self.selected_speeds[removed]))
+        self.selected_size_counts.update(self._count_values(new_sizes))
+        self.selected_speed_counts.update(self._count_values(new_speeds))
+        self.selected_combos = np.concatenate([self.selected_combos[~removed], selected_combos])
+        self.selected_sizes = np.concatenate([self.selected_sizes[~removed], new_sizes])
+        self.selected_speeds = np.concatenate([self.selected_speeds[~removed], new_speeds])
+        if len(self.selected_combos) == 0:
+            raise _FullRebuild("筛选结果为空")
+        if self._use_size_format(self.selected_size_counts, self.selected_speed_counts) != self.profit_format:
+            raise _FullRebuild("毛利表格式分析结论已变化")
+
+        # 替换受影响组合的毛利表行
+        keep = ~np.isin(self.profit_combos, affected_combos)
+        new_rows, new_keys, new_combos, new_sections, new_order = self._build_rows(selected, selected_combos)
+        self.profit_rows = pd.concat([self.profit_rows[keep], new_rows], ignore_index=True)
+        self.profit_keys = pd.concat([self.profit_keys[keep], new_keys], ignore_index=True)
+        self.profit_combos = np.concatenate([self.profit_combos[keep], new_combos])
+        self.profit_sections = np.concatenate([self.profit_sections[keep], new_sections])
+        self.profit_order = np.concatenate([self.profit_order[keep], new_order])
+
+        self.profit_table = self._arrange()
+        logger.info(f"增量更新毛利表：修改{len(positions)}行，重建{len(affected_combos)}个组合，共{len(self.profit_table)}行")
+        return self.profit_table
+
+    def _assign_rows(self, positions: np.ndarray, extracted: pd.DataFrame):
+        """把修改行的提取结果写回全部行，分类列先补充新的类别"""
+        for col in self.rows.columns:
+            values = extracted[col]
+            if is_categorical(self.rows[col]):
+                self.rows[col] = add_categories(self.rows[col], values.dropna().unique())
+                values = values.astype(object)
+            self.rows.iloc[positions, self.rows.columns.get_loc(col)] = values.to_numpy()
+
+    def _combo_ids(self, combos: pd.Series) -> np.ndarray:
+        """配置颜色组合的整数编号（新出现的组合依次编号），空组合为-1"""
+        codes, uniques = pd.factorize(combos)
+        ids = np.array([-1 if combo == '' else self.combo_index.setdefault(combo, len(self.combo_index))
+                        for combo in uniques] + [-1], dtype=np.int64)
+        return ids[codes]
+
+    def _update_first(self, combos):
+        """更新组合首行行号（组合的先后顺序），没有成员的组合不再出现在毛利表中"""
+        if len(self.combo_first) < len(self.combo_index):
+            self.combo_first = np.concatenate([
+                self.combo_first, np.full(len(self.combo_index) - len(self.combo_first), -1, dtype=np.int64)])
+        for combo in combos:
+            members = self.combo_members.get(combo)
+            self.combo_first[combo] = -1 if members is None else members[0]
+
+    def _add_member(self, combo: int, position: int):
+        members = self.combo_members.get(combo)
+        self.combo_members[combo] = np.array([position]) if members is None else np.union1d(members, [position])
+
+    def _remove_member(self, combo: int, position: int):
+        members = np.setdiff1d(self.combo_members[combo], [position])
+        if len(members):
+            self.combo_members[combo] = members
+        else:
+            del self.combo_members[combo]
+
+    def _selected_combos(self, selected: pd.DataFrame) -> np.ndarray:
+        """筛选结果各行的配置颜色组合编号"""
+        if selected.empty:
+            return np.array([], dtype=np.int64)
+        return self._combo_ids(combine_columns(selected['配置'], selected['颜色']))
+
+    def _grouped_by_combo(self, selected_combos: np.ndarray) -> bool:
+        """筛选结果是否按组合排列，且组合按首行行号（即首次出现）的顺序排列"""
+        if len(selected_combos) == 0:
+            return True
+        return bool((np.diff(self.combo_first[selected_combos]) >= 0).all())
+
+    def _build_rows(self, selected: pd.DataFrame, selected_combos: np.ndarray):
+        """生成筛选结果的毛利表行（构建顺序）及其排列键，以及每行的组合、所属部分和组合内顺序"""
+        calculator = self.data_service.profit_calculator
+        profit_rows, positions, sections = calculator.build_profit_rows(selected, self.profit_format)
+        keys = calculator.profit_row_keys(profit_rows) if not profit_rows.empty else pd.DataFrame()
+        combos = selected_combos[positions] if len(positions) else np.array([], dtype=np.int64)
+        order = pd.DataFrame({'部分': sections, '组合': combos}).groupby(['部分', '组合'], sort=False).cumcount()
+        return profit_rows, keys, combos, sections, order.to_numpy(dtype=np.int64)
+
+    def _arrange(self) -> pd.DataFrame:
+        """按构建顺序（部分、组合首次出现的顺序、组合内顺序）排列毛利表行，再排序为毛利表"""
+        order = np.lexsort((self.profit_order, self.combo_first[self.profit_combos], self.profit_sections))
+        profit_rows = self.profit_rows.iloc[order].reset_index(drop=True)
+        row_keys = self.profit_keys.iloc[order].reset_index(drop=True)
+        return self.data_service.profit_calculator.arrange_profit_table(profit_rows, row_keys)
+
+    def _use_size_format(self, size_counts: Counter, speed_counts: Counter) -> bool:
+        """按取值计数判断格式，与 TableFormatAnalyzer 的规则一致：非空尺寸项多于非空速别项时使用尺寸格式"""
+        size_count = sum(1 for value, count in size_counts.items() if count > 0 and value and str(value).strip() != '')
+        speed_count = sum(1 for value, count in speed_counts.items() if count > 0 and value and str(value).strip() != '')
+        return size_count > speed_count
+
+    def _count_values(self, values: np.ndarray) -> Counter:
+        """取值计数（不含空值）"""
+        counts = pd.Series(values, dtype=object).value_counts()
+        return Counter({value: int(count) for value, count in counts.items() if count > 0})
+
+    def _count_change(self, counts: Counter, value, delta: int):
+        if not pd.isna(value):
+            counts[value] += delta
+
+
+class _FullRebuild(Exception):
+    """增量更新过程中发现需要全量重新生成"""
@@ -0,0 +1,100 @@
+"""
+多模式匹配 - Aho-Corasick 自动机，一次线性扫描同时匹配词表中的全部词条
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+class AhoCorasick:
+    """Aho-Corasick 自动机，词表按字面匹配（不是正则表达式）
+
+    扫描耗时只与文本长度有关，词表有成千上万个词条时也不需要逐条匹配。
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 每个状态上结束的词条长度（包括失配链上的），由长到短排列
+        self._outputs: List[Tuple[int, ...]] = [()]
+
+        for word in words:
+            if word:
+                self._add_word(word)
+        self._build_fail_links()
+
+        # 文本中没有任何词条的首字时直接跳过，有时从第一个首字处开始扫描
+        first_chars = sorted(self._goto[0])
+        self._first_char_pattern = (
+            re.compile('[' + ''.join(re.escape(char) for char in first_chars) + ']') if first_chars else None
+        )
+
+    def _add_word(self, word: str):
+        """把词条加入字典树"""
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+            state = next_state
+        self._outputs[state] = (len(word),)
+
+    def _build_fail_links(self):
+        """按层次遍历构建失配指针，并合并失配链上的输出"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fail_state = self._fail[state]
+                while fail_state and char not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                fail_state = self._goto[fail_state].get(char, 0)
+                self._fail[next_state] = fail_state
+                self._outputs[next_state] = tuple(
+                    sorted(set(self._outputs[next_state] + self._outputs[fail_state]), reverse=True)
+                )
+                queue.append(next_state)
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """返回互不重叠的匹配位置 (起始, 结束)，重叠时取起点靠前、其次较长的词条"""
+        if self._first_char_pattern is None:
+            return []
+        search = self._first_char_pattern.search
+        next_match = search(text)
+        if next_match is None:
+            return []
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        candidates = []
+        state = 0
+        end = next_match.start()
+        text_length = len(text)
+        while end < text_length:
+            if not state:
+                # 回到初始状态时，直接跳到下一个可能是词条首字的位置
+                next_match = search(text, end)
+                if next_match is None:
+                    break
+                end = next_match.start()
+            char = text[end]
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            end += 1
+            for length in outputs[state]:
+                candidates.append((end - length, end))
+
+        if len(candidates) > 1:
+            candidates.sort(key=lambda span: (span[0], -span[1]))
+        matches = []
+        last_end = 0
+        for start, end in candidates:
+            if start >= last_end:
+                matches.append((start, end))
+                last_end = end
+        return matches
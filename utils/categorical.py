@@ -0,0 +1,91 @@
+"""
+分类类型工具 - 提取列以 pandas 分类类型（category）存储时使用的辅助函数
+
+类别始终按字典序排列，因此按分类列分组、排序的结果与按字符串处理时一致。
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Any, Callable, Iterable, List
+
+
+def is_categorical(series: pd.Series) -> bool:
+    """判断列是否为分类类型"""
+    return isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def add_categories(series: pd.Series, values: Iterable) -> pd.Series:
+    """为分类列补充新的类别，类别保持字典序；非分类列原样返回"""
+    if not is_categorical(series):
+        return series
+
+    new_values = [value for value in values if value not in series.cat.categories]
+    if not new_values:
+        return series
+    categories = series.cat.categories
+    return series.cat.set_categories(categories.append(pd.Index(new_values, dtype=categories.dtype)).unique().sort_values())
+
+
+def combine_columns(left: pd.Series, right: pd.Series) -> pd.Series:
+    """拼接两列字符串（空值按空字符串处理），结果为分类类型
+
+    只对实际出现的取值组合做字符串拼接，行数很多而组合很少时不必逐行拼接字符串。
+    """
+    left_codes, left_values = _factorize_with_empty(left)
+    right_codes, right_values = _factorize_with_empty(right)
+
+    pair_keys = left_codes.astype(np.int64) * len(right_values) + right_codes
+    unique_keys, inverse = np.unique(pair_keys, return_inverse=True)
+    combined = [
+        left_values[key // len(right_values)] + right_values[key % len(right_values)]
+        for key in unique_keys
+    ]
+
+    categories = sorted(set(combined))
+    category_codes = {value: code for code, value in enumerate(categories)}
+    pair_codes = np.array([category_codes[value] for value in combined], dtype=np.int64)
+    codes = pair_codes[inverse.reshape(-1)] if len(unique_keys) else np.array([], dtype=np.int64)
+
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=left.index)
+
+
+def map_pairs(left: pd.Series, right: pd.Series, func: Callable[[Any, Any], Any]) -> np.ndarray:
+    """对两列中出现过的每个取值组合调用一次 func(左值, 右值)，结果按行展开为 object 数组
+
+    空值原样传给 func，行数很多而组合很少时只需调用少量几次。
+    """
+    left_codes, left_uniques = pd.factorize(left, use_na_sentinel=False)
+    right_codes, right_uniques = pd.factorize(right, use_na_sentinel=False)
+    left_values = np.asarray(left_uniques, dtype=object)
+    right_values = np.asarray(right_uniques, dtype=object)
+
+    width = max(len(right_values), 1)
+    pair_codes, unique_keys = pd.factorize(left_codes.astype(np.int64) * width + right_codes)
+    results = np.empty(len(unique_keys), dtype=object)
+    results[:] = [func(left_values[key // width], right_values[key % width]) for key in unique_keys]
+    return results[pair_codes]
+
+
+def concat_frames(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """合并多个DataFrame，分类列先统一类别，避免合并后退化为 object 类型"""
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+
+    for col in frames[0].columns:
+        if not all(col in frame.columns and is_categorical(frame[col]) for frame in frames):
+            continue
+        categories = sorted(set().union(*(frame[col].cat.categories for frame in frames)))
+        frames = [frame.assign(**{col: frame[col].cat.set_categories(categories)}) for frame in frames]
+
+    return pd.concat(frames)
+
+
+def _factorize_with_empty(series: pd.Series):
+    """编码一列取值，空值编码为空字符串"""
+    codes, uniques = pd.factorize(series)
+    values: List[str] = [str(value) for value in np.asarray(uniques, dtype=object)]
+    values.append('')
+    codes = np.asarray(codes, dtype=np.int64).copy()
+    codes[codes < 0] = len(values) - 1
+    return codes, values
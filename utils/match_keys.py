@@ -0,0 +1,46 @@
+"""
+匹配键工具 - 反向改价时原始数据与毛利表的匹配键（简称|速别）
+
+毛利表生成时把各行的规范化简称、速别文本保存在隐藏列中，导出后重新导入时直接使用，
+不必再逐行转换文本；单元格被修改过的行仍按可见列重新计算。
+"""
+
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_string_dtype
+
+# 毛利表中保存规范化匹配文本的隐藏列：（隐藏列, 对应的可见列）
+MATCH_KEY_COLUMNS = {'匹配简称': '简称', '匹配速别': '速别'}
+
+
+def canonical_text(series: pd.Series) -> pd.Series:
+    """匹配用的文本：按 str() 转换并去掉首尾空白（空值为"nan"），每个不同的取值只转换一次"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    texts = np.array([str(value).strip() for value in np.asarray(uniques, dtype=object)] + [''], dtype=object)
+    return pd.Series(texts[codes], index=series.index, dtype=object)
+
+
+def stored_text(table: pd.DataFrame, col: str) -> pd.Series:
+    """表格中一列的匹配文本，缺少该列时为空字符串
+
+    有对应的隐藏列时，可见单元格与隐藏列相同的行直接使用隐藏列的文本，其余行（被修改过、
+    隐藏列为空或不是文本）按可见列重新转换。
+    """
+    if col not in table.columns:
+        return pd.Series('', index=table.index, dtype=object)
+
+    hidden_col = next((hidden for hidden, visible in MATCH_KEY_COLUMNS.items() if visible == col), None)
+    if hidden_col is None or hidden_col not in table.columns or not is_string_dtype(table[hidden_col]):
+        return canonical_text(table[col])
+
+    hidden = table[hidden_col].to_numpy(dtype=object)
+    texts = pd.Series(hidden, index=table.index, dtype=object)
+    stale = ~(table[col].to_numpy(dtype=object) == hidden)
+    if stale.any():
+        texts[stale] = canonical_text(table[col][stale]).to_numpy()
+    return texts
+
+
+def join_key(names: pd.Series, speeds: pd.Series) -> pd.Series:
+    """匹配键：简称|速别，速别为空时只用简称"""
+    return (names + '|' + speeds).where(speeds != '', names)
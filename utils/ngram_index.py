@@ -0,0 +1,59 @@
+"""
+n-gram 倒排索引 - 按字符 n-gram 的重合程度查找最相似的文本，只对倒排表中的候选打分
+"""
+
+import numpy as np
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+
+class NgramIndex:
+    """字符 n-gram 倒排索引
+
+    相似度为 Dice 系数：2 × 共有 n-gram 数 / (两者 n-gram 数之和)，取值 0~1。
+    查询时先用较少见的 n-gram 的倒排表选出候选（出现在大量文本中的 n-gram 区分度低，只参与打分），
+    按命中次数保留前 max_candidates 个候选，再精确计算相似度。
+    """
+
+    def __init__(self, texts: Iterable[str], n: int = 2, max_candidates: int = 50, common_ratio: float = 0.05):
+        self.n = n
+        self.max_candidates = max_candidates
+        self.texts: List[str] = list(texts)
+        self._grams: List[FrozenSet[str]] = [self.ngrams(text) for text in self.texts]
+
+        postings: Dict[str, List[int]] = {}
+        for text_id, grams in enumerate(self._grams):
+            for gram in grams:
+                postings.setdefault(gram, []).append(text_id)
+        self._postings: Dict[str, np.ndarray] = {
+            gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()
+        }
+        # 出现在超过此数量的文本中的 n-gram 不用于选取候选
+        self._common_limit = max(1, int(len(self.texts) * common_ratio))
+
+    def ngrams(self, text: str) -> FrozenSet[str]:
+        """文本的 n-gram 集合，短于 n 的文本以整个文本作为唯一的 n-gram"""
+        if len(text) <= self.n:
+            return frozenset([text]) if text else frozenset()
+        return frozenset(text[i:i + self.n] for i in range(len(text) - self.n + 1))
+
+    def search(self, query: str) -> Tuple[int, float]:
+        """返回（最相似文本的序号, 相似度），没有共有 n-gram 时为（-1, 0.0）；相似度相同时取序号小的"""
+        grams = self.ngrams(query)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not postings:
+            return -1, 0.0
+
+        rare = [ids for ids in postings if len(ids) <= self._common_limit]
+        candidate_ids, hits = np.unique(np.concatenate(rare or postings), return_counts=True)
+        if len(candidate_ids) > self.max_candidates:
+            # 命中次数多的优先，次数相同时序号小的优先
+            keep = np.lexsort((candidate_ids, -hits))[:self.max_candidates]
+            candidate_ids = np.sort(candidate_ids[keep])
+
+        best_id, best_score = -1, 0.0
+        for text_id in candidate_ids:
+            candidate = self._grams[text_id]
+            score = 2 * len(grams & candidate) / (len(grams) + len(candidate))
+            if score > best_score:
+                best_id, best_score = int(text_id), score
+        return best_id, best_score
@@ -0,0 +1,29 @@
+"""
+数值列工具 - 把导入数据或用户编辑过的表格中的金额、毛利率列转换为浮点数
+"""
+
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+# 改价后新毛利率的状态列：0 为正常（新毛利率为小数），其余状态的新毛利率为NaN，导出时显示对应文字
+RATE_STATUS_COLUMN = '毛利率状态'
+RATE_STATUS_LABELS = {1: '无法计算', 2: '计算错误'}
+
+
+def to_number(series: pd.Series) -> pd.Series:
+    """转换为浮点数列，文本中的千分位逗号会去掉，无法识别的取值为NaN"""
+    if is_numeric_dtype(series) and not is_bool_dtype(series):
+        return series.astype(float)
+    text = series.astype(str).str.strip().str.replace(',', '', regex=False)
+    return pd.to_numeric(text, errors='coerce').astype(float)
+
+
+def to_rate(series: pd.Series) -> pd.Series:
+    """毛利率列转换为小数：带百分号的文本和大于1的数值按百分数处理"""
+    if is_numeric_dtype(series) and not is_bool_dtype(series):
+        values = series.astype(float)
+        return values.where(~(values > 1), values / 100)
+    text = series.astype(str).str.strip().str.replace(',', '', regex=False)
+    is_percent = text.str.endswith('%')
+    values = pd.to_numeric(text.str.rstrip('%'), errors='coerce').astype(float)
+    return values.where(~(is_percent | (values > 1)), values / 100)